@@ -1,7 +1,8 @@
 """Import files (models)."""
 
-from . import models
+from . import controllers, models
 
 __all__ = [
+    'controllers',
     'models',
 ]
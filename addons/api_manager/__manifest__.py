@@ -6,11 +6,13 @@
     'license': 'AGPL-3',
     'website': 'https://www.gymbeam.com',
     'category': 'API',
-    'version': '13.0.0.0.0',
+    'version': '13.0.1.0.0',
     # any module necessary for this one to work correctly
     'depends': ['base'],
     # always loaded
     'data': [
+        # Data
+        'data/cron.xml',
         # Security
         'security/security.xml',
         'security/ir.model.access.csv',
@@ -18,6 +20,8 @@
         'views/provider.xml',
         'views/request.xml',
         'views/request_parameter.xml',
+        'views/request_retry.xml',
+        'views/metrics.xml',
         'views/logger.xml',
         # Menu Items
         'views/actions.xml',
@@ -0,0 +1,5 @@
+"""Import controllers."""
+
+from . import metrics
+
+__all__ = ['metrics']
@@ -0,0 +1,32 @@
+"""Module for API Manager metrics endpoint."""
+
+import hmac
+
+from odoo import http
+from werkzeug.exceptions import NotFound, Unauthorized
+
+TOKEN_PARAMETER = 'api_manager.metrics_token'
+
+
+class MetricsEndpoint(http.Controller):
+    """Endpoint for Prometheus scraper."""
+
+    @http.route('/api_manager/metrics', type='http', auth="public", methods=['GET'], csrf=False)
+    def metrics(self):
+        """
+        Return request metrics in Prometheus text format.
+
+        Endpoint is disabled until system parameter 'api_manager.metrics_token' is set,
+        scraper must send it as bearer token.
+        """
+        env = http.request.env
+        token = env['ir.config_parameter'].sudo().get_param(TOKEN_PARAMETER)
+        if not token:
+            raise NotFound()
+        authorization = http.request.httprequest.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+            raise Unauthorized()
+        return http.request.make_response(
+            env['api_manager.metrics'].sudo()._render_prometheus(),  # pylint:disable=W0212
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')],
+        )
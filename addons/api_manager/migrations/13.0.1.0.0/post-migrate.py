@@ -0,0 +1,47 @@
+"""Compress text payloads of API logs into binary column."""
+
+import logging
+
+from psycopg2.extras import execute_values
+
+from odoo.addons.api_manager.utils import log_codec
+
+_logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 10000
+
+
+def migrate(cr, version):
+    """Convert logs in chunks and drop the text column."""
+    if not version:
+        return
+    converted = 0
+    while True:
+        cr.execute(
+            """
+            SELECT id, legacy_data FROM api_manager_logger
+            WHERE payload IS NULL AND legacy_data IS NOT NULL
+            ORDER BY id
+            LIMIT %s
+            """,
+            (CHUNK_SIZE,),
+        )
+        rows = cr.fetchall()
+        if not rows:
+            break
+        values = []
+        for log_id, text in rows:
+            payload, codec = log_codec.compress(log_codec.dumps(text))
+            values.append((log_id, payload, codec))
+        execute_values(
+            cr._obj,  # pylint:disable=W0212
+            """
+            UPDATE api_manager_logger l SET payload = v.payload, codec = v.codec
+            FROM (VALUES %s) AS v (id, payload, codec)
+            WHERE l.id = v.id
+            """,
+            values,
+        )
+        converted += len(rows)
+        _logger.info("Compressed %s API logs.", converted)
+    cr.execute("ALTER TABLE api_manager_logger DROP COLUMN legacy_data")
@@ -0,0 +1,9 @@
+"""Keep text payloads of API logs until they are compressed by post-migrate."""
+
+
+def migrate(cr, version):
+    """Rename text column, so ORM doesn't touch it and new rows don't need it."""
+    if not version:
+        return
+    cr.execute("ALTER TABLE api_manager_logger RENAME COLUMN data TO legacy_data")
+    cr.execute("ALTER TABLE api_manager_logger ALTER COLUMN legacy_data DROP NOT NULL")
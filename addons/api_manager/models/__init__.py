@@ -1,13 +1,25 @@
 """Import models."""
 
+from . import circuit_event
+from . import log_policy
 from . import logger
+from . import logger_key
+from . import metrics
 from . import provider
+from . import rate_limit
 from . import request
 from . import request_parameter
+from . import request_retry
 
 __all__ = [
+    'circuit_event',
     'provider',
+    'rate_limit',
     'request',
     'request_parameter',
+    'request_retry',
+    'log_policy',
     'logger',
+    'logger_key',
+    'metrics',
 ]
@@ -0,0 +1,25 @@
+"""Module for API Provider circuit breaker history."""
+
+from odoo import fields, models
+
+CIRCUIT_STATES = [
+    ('closed', "Closed"),
+    ('open', "Open"),
+    ('half_open', "Half-Open"),
+]
+
+
+class APICircuitEvent(models.Model):
+    """State transition of provider circuit breaker."""
+
+    _name = 'api_manager.circuit_event'
+    _description = "Circuit Breaker Event"
+    _order = 'created_at desc, id desc'
+
+    provider_id = fields.Many2one(
+        'api_manager.provider', string="Provider", required=True, index=True, ondelete='cascade'
+    )
+    created_at = fields.Datetime(default=fields.Datetime.now, required=True)
+    from_state = fields.Selection(CIRCUIT_STATES, string="From", required=True)
+    to_state = fields.Selection(CIRCUIT_STATES, string="To", required=True)
+    reason = fields.Char()
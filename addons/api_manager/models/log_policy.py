@@ -0,0 +1,113 @@
+"""Module for API Log policies."""
+
+from odoo import _, api, fields, models, tools
+from odoo.exceptions import ValidationError
+
+from ..utils.log_filter import DEFAULT_FILTER, LogFilter, parse_names
+
+# Retention of origins without policy, overridden by system parameter, 0 keeps logs forever
+RETENTION_PARAMETER = 'api_manager.log_retention_days'
+DEFAULT_RETENTION_DAYS = 0
+
+
+class APILogPolicy(models.Model):
+    """Logging policy of single log origin."""
+
+    _name = 'api_manager.log_policy'
+    _description = "Log Policy"
+    _order = 'origin'
+    _rec_name = 'origin'
+
+    origin = fields.Char(
+        required=True, help="Origin of logs, usually python module which created them."
+    )
+    retention_days = fields.Integer(
+        "Retention (days)",
+        default=DEFAULT_RETENTION_DAYS,
+        required=True,
+        help="Logs older than this are deleted, 0 keeps logs forever.",
+    )
+    sample_rate = fields.Float(
+        default=1.0, required=True, help="Share of logged entries, 1 logs everything."
+    )
+    log_errors = fields.Boolean(
+        "Always Log Errors",
+        default=True,
+        help="Failed exchanges are logged regardless of sampling.",
+    )
+    max_payload_bytes = fields.Integer(
+        "Max Payload (bytes)", default=0, help="Longer bodies are truncated, 0 means no limit."
+    )
+    hash_body = fields.Boolean(help="Store only SHA-256 hash and size of the body.")
+    header_allowlist = fields.Char(
+        "Allowed Headers", help="Comma separated header names, all headers are logged if empty."
+    )
+    redacted_headers = fields.Char(
+        default="Authorization, Cookie, Set-Cookie",
+        help="Comma separated header names whose values are masked.",
+    )
+    log_cookies = fields.Boolean(default=False)
+
+    _sql_constraints = [
+        ('origin_uniq', 'unique (origin)', "Origin can have only one log policy!"),
+    ]
+
+    @api.constrains('retention_days')
+    def _check_retention_days(self):
+        if any(policy.retention_days < 0 for policy in self):
+            raise ValidationError(_("Retention can't be negative."))
+
+    @api.constrains('sample_rate', 'max_payload_bytes')
+    def _check_sampling(self):
+        for policy in self:
+            if not 0 <= policy.sample_rate <= 1:
+                raise ValidationError(_("Sample rate must be between 0 and 1."))
+            if policy.max_payload_bytes < 0:
+                raise ValidationError(_("Maximum payload size can't be negative."))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Invalidate cached policies."""
+        res = super(APILogPolicy, self).create(vals_list)
+        self.clear_caches()
+        return res
+
+    def write(self, vals):  # pylint:disable=W8106
+        """Invalidate cached policies."""
+        res = super(APILogPolicy, self).write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        """Invalidate cached policies."""
+        res = super(APILogPolicy, self).unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    @tools.ormcache('origin')
+    def _get_filter(self, origin: str) -> LogFilter:
+        """
+        Return compiled policy of origin, default policy if origin has none.
+
+        :param origin: Origin of logs
+        :return: LogFilter
+        """
+        policy = self.search([('origin', '=', origin)], limit=1)
+        if not policy:
+            return DEFAULT_FILTER
+        return LogFilter(
+            sample_rate=policy.sample_rate,
+            log_errors=policy.log_errors,
+            max_payload_bytes=policy.max_payload_bytes,
+            hash_body=policy.hash_body,
+            header_allowlist=parse_names(policy.header_allowlist),
+            redacted_headers=parse_names(policy.redacted_headers),
+            log_cookies=policy.log_cookies,
+        )
+
+    @api.model
+    def _get_default_retention(self) -> int:
+        """Return retention in days of origins without policy."""
+        value = self.env['ir.config_parameter'].sudo().get_param(RETENTION_PARAMETER)
+        return int(value) if value else DEFAULT_RETENTION_DAYS
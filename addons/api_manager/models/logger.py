@@ -1,15 +1,85 @@
 """Module for managing API Providers."""
 
+import atexit
+import json
 import logging
 import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Union
 
-from odoo import api, fields, models
+from odoo import _, api, fields, models, sql_db, SUPERUSER_ID, tools
+from odoo.exceptions import ValidationError
 
-from ..utils import exceptions
+from ..utils import exceptions, json_codec, log_codec
+from ..utils.log_buffer import LogBuffer
 
 LOG_ORIGIN = __name__
 _logger = logging.getLogger(LOG_ORIGIN)
 
+# Maximum span of :func:`APILogger.search_logs` and number of returned logs
+MAX_SEARCH_DAYS = 31
+MAX_SEARCH_LIMIT = 1000
+
+_LOG_COLUMNS = (
+    'id',
+    'created_at',
+    'origin',
+    'direction',
+    'payload',
+    'codec',
+    'endpoint',
+    'request_id',
+    'status_code',
+    'correlation_key',
+    'elapsed',
+    'create_uid',
+    'create_date',
+    'write_uid',
+    'write_date',
+)
+
+
+def _write_logs(dbname: str, rows: List[Sequence[Any]]) -> None:
+    """
+    Compress payloads and insert rows of api_manager_logger in single statement.
+
+    Ids are taken from the sequence first, so correlation keys are inserted with their logs
+    in one more statement.
+
+    :param dbname: Database name
+    :param rows: Tuples (created_at, origin, direction, data, keys, *indexed values),
+        see :func:`APILogger.log`
+    """
+    with sql_db.db_connect(dbname).cursor() as cr:
+        cr.execute(
+            "SELECT nextval('api_manager_logger_id_seq') FROM generate_series(1, %s)", [len(rows)]
+        )
+        ids = [row[0] for row in cr.fetchall()]
+        values = []
+        keys = []
+        for log_id, (created_at, origin, direction, data, log_keys, *indexed) in zip(ids, rows):
+            payload, codec = log_codec.compress(log_codec.dumps(data))
+            audit = (SUPERUSER_ID, created_at, SUPERUSER_ID, created_at)
+            values.append((log_id, created_at, origin, direction, payload, codec, *indexed) + audit)
+            keys += [(log_id, key) for key in log_keys]
+        template = f"({', '.join(['%s'] * len(_LOG_COLUMNS))})"
+        rows_sql = ', '.join(cr.mogrify(template, row).decode() for row in values)
+        cr.execute(f"INSERT INTO api_manager_logger ({', '.join(_LOG_COLUMNS)}) VALUES {rows_sql}")
+        if keys:
+            keys_sql = ', '.join(cr.mogrify("(%s, %s)", key).decode() for key in keys)
+            cr.execute(f"INSERT INTO api_manager_logger_key (log_id, key) VALUES {keys_sql}")
+
+
+# Buffer is configured in server configuration file, e.g. 'api_log_buffer_policy = block'
+LOG_BUFFER = LogBuffer(
+    _write_logs,
+    max_size=int(tools.config.get('api_log_buffer_size', 10000)),
+    batch_size=int(tools.config.get('api_log_batch_size', 500)),
+    flush_interval=float(tools.config.get('api_log_flush_interval', 1.0)),
+    policy=tools.config.get('api_log_buffer_policy', 'drop'),
+)
+atexit.register(LOG_BUFFER.close)
+
 
 class APILogger(models.Model):
     """API Logs of incomming and outgoing traffic."""
@@ -28,7 +98,169 @@ class APILogger(models.Model):
         default='response',
         required=True,
     )
-    data = fields.Char(required=True)
+    payload = fields.Binary(
+        attachment=False, prefetch=False, readonly=True, help="Compressed JSON of logged data."
+    )
+    codec = fields.Selection(log_codec.CODECS, readonly=True)
+    data = fields.Text(compute='_compute_data', inverse='_inverse_data')
+    # Extracted when logged, so logs are searched without reading payloads
+    endpoint = fields.Char(help="Called URL path or path of incoming request.")
+    request_id = fields.Many2one('api_manager.request', string="Request", ondelete='set null')
+    status_code = fields.Integer(help="Response status code, 0 if there was no response.")
+    correlation_key = fields.Char(
+        help="Business references of logged exchange, e.g. PoS order references. "
+        "Shortened for display, logs are searched by correlation keys."
+    )
+    correlation_key_ids = fields.One2many(
+        'api_manager.logger_key', 'log_id', string="Correlation Keys", readonly=True
+    )
+    elapsed = fields.Float("Duration (s)")
+
+    def _compute_data(self):
+        """Decompress payload, it is read only when log is opened."""
+        payloads = {}
+        if self.ids:
+            self.env.cr.execute(
+                "SELECT id, payload, codec FROM api_manager_logger WHERE id IN %s",
+                (tuple(self.ids),),
+            )
+            payloads = {row[0]: row[1:] for row in self.env.cr.fetchall()}
+        for log in self:
+            blob, codec = payloads.get(log.id, (None, None))
+            if blob is None:
+                log.data = False
+                continue
+            try:
+                value = json_codec.loads(log_codec.decompress(bytes(blob), codec))
+            except ValueError as error:
+                log.data = str(error)
+                continue
+            if isinstance(value, str):
+                log.data = value
+            else:
+                log.data = json.dumps(value, indent=2, ensure_ascii=False)
+
+    def _inverse_data(self):
+        """Compress data written through ORM."""
+        for log in self:
+            payload, codec = log_codec.compress(log_codec.dumps(log.data))
+            self.env.cr.execute(
+                "UPDATE api_manager_logger SET payload = %s, codec = %s WHERE id = %s",
+                (payload, codec, log.id),
+            )
+        self.invalidate_cache(['payload', 'codec'], self.ids)
+
+    @api.model
+    def log(  # pylint:disable=too-many-arguments
+        self,
+        origin: str,
+        direction: str,
+        data: Dict[str, Any],
+        failed: bool = False,
+        endpoint: Optional[str] = None,
+        request=None,
+        status_code: Optional[int] = None,
+        correlation_key: Optional[Union[str, Sequence[str]]] = None,
+        elapsed: Optional[float] = None,
+    ) -> bool:
+        """
+        Queue log entry, it is compressed and written in bulk by background thread.
+
+        Unlike :func:`create`, caller's transaction isn't touched and no database round trip
+        is made. Entry is stored even if caller's transaction is rolled back.
+        Log policy of origin is applied first, see api_manager.log_policy.
+
+        :param origin: Origin of the log, usually module name
+        :param direction: 'incoming' or 'outgoing'
+        :param data: Logged data, keys 'headers', 'cookies' and 'data' are filtered by policy
+        :param failed: True if logged exchange failed, such entries may bypass sampling
+        :param endpoint: URL path
+        :param request: api_manager.request record
+        :param status_code: Response status code, False if there was no response
+        :param correlation_key: Business reference or list of them, e.g. references of all
+            orders of a webhook, each is stored as separate key, see :func:`search_logs`
+        :param elapsed: Duration of exchange in seconds
+
+        :return: False if entry was skipped by sampling or dropped because the buffer is full
+        """
+        log_filter = self.env['api_manager.log_policy'].sudo()._get_filter(origin)
+        if not log_filter.should_log(failed):
+            return False
+        if not isinstance(correlation_key, (list, tuple, set)):
+            correlation_key = [correlation_key]
+        keys = list(dict.fromkeys(str(key)[:255] for key in correlation_key if key))
+        row = (
+            fields.Datetime.now(),
+            origin,
+            direction,
+            log_filter.apply(data),
+            keys,
+            endpoint,
+            request.id if request else None,
+            None if status_code is None else int(status_code or 0),
+            ','.join(keys)[:255] or None,
+            elapsed,
+        )
+        return LOG_BUFFER.put(self.env.cr.dbname, row)
+
+    @api.model
+    def search_logs(  # pylint:disable=too-many-arguments
+        self,
+        date_from,
+        date_to,
+        correlation_key: Optional[str] = None,
+        partial: bool = False,
+        origin: Optional[str] = None,
+        direction: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        request=None,
+        status_code: Optional[int] = None,
+        limit: int = 100,
+    ):
+        """
+        Search logs in time range by indexed fields, newest first.
+
+        Range is mandatory and limited to :data:`MAX_SEARCH_DAYS`, so search never scans
+        whole table. Correlation key matches any key of the log, exact one uses B-tree index
+        of api_manager.logger_key, partial one its trigram index.
+
+        :param date_from: Start of time range (inclusive)
+        :param date_to: End of time range (exclusive)
+        :param correlation_key: Business reference, e.g. PoS order reference
+        :param partial: Match correlation key as substring
+        :param origin: Origin of logs
+        :param direction: 'incoming' or 'outgoing'
+        :param endpoint: Prefix of URL path
+        :param request: api_manager.request record
+        :param status_code: Response status code, 0 for exchanges without response
+        :param limit: Maximum of returned logs
+
+        :raises ValidationError: If time range is missing or too long
+        :return: api_manager.logger recordset
+        """
+        date_from = fields.Datetime.to_datetime(date_from)
+        date_to = fields.Datetime.to_datetime(date_to)
+        if not (date_from and date_to) or date_to <= date_from:
+            raise ValidationError(_("Log search requires valid time range."))
+        if date_to - date_from > timedelta(days=MAX_SEARCH_DAYS):
+            raise ValidationError(_("Log search range can't exceed %s days.") % MAX_SEARCH_DAYS)
+        domain = [('created_at', '>=', date_from), ('created_at', '<', date_to)]
+        if correlation_key:
+            operator = 'ilike' if partial else '='
+            domain.append(('correlation_key_ids.key', operator, correlation_key))
+        if origin:
+            domain.append(('origin', '=', origin))
+        if direction:
+            domain.append(('direction', '=', direction))
+        if endpoint:
+            domain.append(('endpoint', '=like', f"{endpoint}%"))
+        if request:
+            domain.append(('request_id', '=', request.id))
+        if status_code is not None:
+            domain.append(('status_code', '=', status_code))
+        return self.search(
+            domain, limit=min(limit, MAX_SEARCH_LIMIT), order='created_at desc, id desc'
+        )
 
     def _preprocess(self, method, *args, **kwargs):
         """
@@ -102,9 +334,65 @@ class APILogger(models.Model):
             parent.__class__.__name__, method_name, env=env, origin=LOG_ORIGIN, severity='error'
         )
 
-    def _clear_logs(self):
-        """Clear logs older then one month."""
-        for log in self.search(
-            [('created_at', '<', fields.Datetime.now() - relativedelta(months=1))]
-        ):
-            log.unlink()
+    def init(self):
+        """Create indexes used by retention and :func:`search_logs`."""
+        for column in ('origin', 'request_id', 'endpoint'):
+            tools.create_index(
+                self.env.cr,
+                f'api_manager_logger_{column}_created_at_index',
+                self._table,
+                [column, 'created_at'],
+            )
+
+    @api.model
+    def _clear_logs(self, chunk_size=10000):
+        """
+        Delete logs older than retention of their origin.
+
+        Retention is taken from api_manager.log_policy, origins without policy use default
+        retention. Logs are deleted in chunks, each chunk is committed separately, so cleanup
+        never holds locks on millions of rows and autovacuum can reuse the space meanwhile.
+
+        :param chunk_size: Maximum of rows deleted in single statement
+        """
+        policy_model = self.env['api_manager.log_policy'].sudo()
+        policies = policy_model.search([])
+        for policy in policies:
+            if policy.retention_days:
+                self._delete_chunked(
+                    "origin = %s", [policy.origin], policy.retention_days, chunk_size
+                )
+        default_retention = policy_model._get_default_retention()  # pylint:disable=W0212
+        if default_retention:
+            origins = tuple(policies.mapped('origin'))
+            if origins:
+                condition, params = "origin NOT IN %s", [origins]
+            else:
+                condition, params = "TRUE", []
+            self._delete_chunked(condition, params, default_retention, chunk_size)
+
+    def _delete_chunked(self, condition: str, params: list, retention_days: int, chunk_size: int):
+        """
+        Delete logs matching condition and older than retention, commit after every chunk.
+
+        :param condition: SQL condition on api_manager_logger
+        :param params: Parameters of the condition
+        :param retention_days: Age of the oldest kept log in days
+        :param chunk_size: Maximum of rows deleted in single statement
+        """
+        cutoff = fields.Datetime.now() - timedelta(days=retention_days)
+        deleted = chunk_size
+        while deleted == chunk_size:
+            self.env.cr.execute(
+                f"""
+                DELETE FROM api_manager_logger WHERE id IN (
+                    SELECT id FROM api_manager_logger
+                    WHERE {condition} AND created_at < %s
+                    LIMIT %s
+                )
+                """,
+                (*params, cutoff, chunk_size),
+            )
+            deleted = self.env.cr.rowcount
+            self.env.cr.commit()  # pylint:disable=E8102
+            _logger.info("Deleted %s API logs older than %s.", deleted, cutoff)
@@ -0,0 +1,40 @@
+"""Module for correlation keys of API logs."""
+
+import logging
+
+import psycopg2
+from odoo import fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class APILoggerKey(models.Model):
+    """Business reference of API log, log has one key for every referenced object."""
+
+    _name = 'api_manager.logger_key'
+    _description = "API Log Correlation Key"
+    _rec_name = 'key'
+    _log_access = False
+
+    log_id = fields.Many2one(
+        'api_manager.logger', string="Log", required=True, index=True, ondelete='cascade'
+    )
+    key = fields.Char(required=True, index=True)
+
+    def init(self):
+        """Create trigram index for partial search of keys if pg_trgm is available."""
+        cr = self.env.cr
+        cr.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", [self._table + '_trgm_idx'])
+        if cr.fetchone():
+            return
+        try:
+            with cr.savepoint():
+                cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cr.execute(
+                    f"CREATE INDEX {self._table}_trgm_idx ON {self._table} "
+                    "USING gin (key gin_trgm_ops)"
+                )
+        except psycopg2.Error:
+            _logger.warning(
+                "Extension pg_trgm is not available, partial search of API logs is not indexed."
+            )
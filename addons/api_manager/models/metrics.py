@@ -0,0 +1,265 @@
+"""Module for API Request metrics."""
+
+import logging
+from typing import Any, Optional
+
+from odoo import api, fields, models
+
+from ..utils.metrics import LATENCY_BUCKETS, METRICS, MetricsKey, status_class, transferred_bytes
+
+_logger = logging.getLogger(__name__)
+
+# Seconds between flushes of in-memory metrics of one process
+FLUSH_INTERVAL = 60
+# Columns with number of requests in latency bucket, in order of LATENCY_BUCKETS
+BUCKET_FIELDS = (
+    'le_100ms',
+    'le_250ms',
+    'le_500ms',
+    'le_1s',
+    'le_2500ms',
+    'le_5s',
+    'le_10s',
+    'le_30s',
+)
+SCALAR_FIELDS = (
+    'count',
+    'timeouts',
+    'retries',
+    'bytes_sent',
+    'bytes_received',
+    'latency_count',
+    'latency_sum',
+)
+COUNTER_FIELDS = SCALAR_FIELDS + BUCKET_FIELDS
+# Period of rows accumulating expired hours, so exported totals never decrease
+ROLLUP_PERIOD = '1970-01-01 00:00:00'
+STATUS_CLASSES = [
+    ('2xx', '2xx'),
+    ('3xx', '3xx'),
+    ('4xx', '4xx'),
+    ('5xx', '5xx'),
+    ('error', 'No Response'),
+    ('rejected', 'Rejected'),
+]
+
+
+class APIMetrics(models.Model):
+    """
+    Hourly request metrics of request record and status class.
+
+    Rows are written only by :func:`_flush` which adds counters accumulated in memory of
+    current process to the row of current hour. Expired hours are added to the row of
+    :data:`ROLLUP_PERIOD` before they are deleted.
+    """
+
+    _name = 'api_manager.metrics'
+    _description = "Request Metrics"
+    _order = 'period_start desc, provider_id, request_id'
+    _log_access = False
+
+    provider_id = fields.Many2one(
+        'api_manager.provider', string="Provider", required=True, ondelete='cascade', index=True
+    )
+    request_id = fields.Many2one(
+        'api_manager.request', string="Request", required=True, ondelete='cascade'
+    )
+    status_class = fields.Selection(STATUS_CLASSES, required=True)
+    period_start = fields.Datetime("Hour", required=True, index=True)
+    count = fields.Integer("Requests", group_operator='sum')
+    timeouts = fields.Integer(group_operator='sum')
+    retries = fields.Integer(group_operator='sum')
+    # Float, because hourly traffic may not fit into integer column
+    bytes_sent = fields.Float("Bytes Sent", digits=(16, 0), group_operator='sum')
+    bytes_received = fields.Float("Bytes Received", digits=(16, 0), group_operator='sum')
+    latency_count = fields.Integer("Timed Requests", group_operator='sum')
+    latency_sum = fields.Float("Total Latency (s)", group_operator='sum')
+    latency_avg = fields.Float("Average Latency (s)", compute='_compute_latency_avg')
+    le_100ms = fields.Integer("≤ 0.1s", group_operator='sum')
+    le_250ms = fields.Integer("≤ 0.25s", group_operator='sum')
+    le_500ms = fields.Integer("≤ 0.5s", group_operator='sum')
+    le_1s = fields.Integer("≤ 1s", group_operator='sum')
+    le_2500ms = fields.Integer("≤ 2.5s", group_operator='sum')
+    le_5s = fields.Integer("≤ 5s", group_operator='sum')
+    le_10s = fields.Integer("≤ 10s", group_operator='sum')
+    le_30s = fields.Integer("≤ 30s", group_operator='sum')
+
+    _sql_constraints = [
+        (
+            'series_uniq',
+            'unique (provider_id, request_id, status_class, period_start)',
+            "Metrics of request and status class can be stored only once per hour!",
+        ),
+    ]
+
+    @api.depends('latency_count', 'latency_sum')
+    def _compute_latency_avg(self):
+        for record in self:
+            record.latency_avg = record.latency_sum / (record.latency_count or 1)
+
+    @api.model
+    def _observe(  # pylint:disable=too-many-arguments
+        self,
+        request,
+        status_code,
+        elapsed: Optional[float],
+        response: Any = None,
+        timed_out: bool = False,
+        retry: bool = False,
+    ) -> None:
+        """
+        Record outcome of request in memory, flush metrics of the process when due.
+
+        :param request: api_manager.request record
+        :param status_code: Response status code or False if there is no response
+        :param elapsed: Duration of request in seconds or None if request wasn't sent
+        :param response: requests.Response if any
+        :param timed_out: True if request timed out or missed its deadline
+        :param retry: True if request was a retry of failed request
+        """
+        key = MetricsKey(
+            self.env.cr.dbname,
+            request.provider.id,
+            request.id,
+            status_class(status_code, elapsed is not None),
+        )
+        bytes_sent, bytes_received = transferred_bytes(response)
+        METRICS.observe(key, elapsed, bytes_sent, bytes_received, timed_out, retry)
+        if METRICS.is_due(self.env.cr.dbname, FLUSH_INTERVAL):
+            self._flush()
+
+    @api.model
+    def _flush(self) -> None:
+        """
+        Add metrics accumulated by current process to rows of current hour.
+
+        Runs in isolated transaction, so metrics are stored regardless of caller's transaction.
+        Metrics are kept in memory for next flush if database is not available.
+        """
+        drained = METRICS.drain(self.env.cr.dbname)
+        if not drained:
+            return
+        updates = ', '.join(
+            f"{name} = api_manager_metrics.{name} + EXCLUDED.{name}" for name in COUNTER_FIELDS
+        )
+        query = f"""
+            INSERT INTO api_manager_metrics (
+                provider_id, request_id, status_class, period_start, {', '.join(COUNTER_FIELDS)}
+            )
+            SELECT %s, %s, %s, date_trunc('hour', now() AT TIME ZONE 'UTC'),
+                {', '.join(['%s'] * len(COUNTER_FIELDS))}
+            WHERE EXISTS (SELECT 1 FROM api_manager_request WHERE id = %s)
+            ON CONFLICT (provider_id, request_id, status_class, period_start)
+            DO UPDATE SET {updates}
+        """
+        try:
+            with api.Environment.manage(), self.pool.cursor() as new_cr:
+                for key, series in drained:
+                    values = [getattr(series, name) for name in SCALAR_FIELDS] + series.buckets
+                    new_cr.execute(query, (*key[1:], *values, key.request_id))
+        except Exception:  # pylint:disable=W0703
+            _logger.exception("Flush of request metrics failed, it will be repeated.")
+            METRICS.restore(drained)
+
+    @api.model
+    def _clear_metrics(self, days=90):
+        """
+        Delete metrics older than given number of days.
+
+        Deleted counters are added to the rollup row of their series in the same statement,
+        so totals exported to Prometheus stay monotonic.
+        """
+        columns = ', '.join(COUNTER_FIELDS)
+        sums = ', '.join(f"SUM({name})" for name in COUNTER_FIELDS)
+        updates = ', '.join(
+            f"{name} = api_manager_metrics.{name} + EXCLUDED.{name}" for name in COUNTER_FIELDS
+        )
+        self.env.cr.execute(
+            f"""
+            WITH expired AS (
+                DELETE FROM api_manager_metrics
+                WHERE period_start < (now() AT TIME ZONE 'UTC') - %s * interval '1 day'
+                AND period_start > %s
+                RETURNING provider_id, request_id, status_class, {columns}
+            )
+            INSERT INTO api_manager_metrics (
+                provider_id, request_id, status_class, period_start, {columns}
+            )
+            SELECT provider_id, request_id, status_class, %s, {sums}
+            FROM expired
+            GROUP BY provider_id, request_id, status_class
+            ON CONFLICT (provider_id, request_id, status_class, period_start)
+            DO UPDATE SET {updates}
+            """,
+            (days, ROLLUP_PERIOD, ROLLUP_PERIOD),
+        )
+
+    @api.model
+    def _render_prometheus(self) -> str:
+        """
+        Return totals of stored metrics in Prometheus text exposition format.
+
+        Totals include rollup rows, so they don't drop when old hours are deleted.
+
+        Metrics of current process are flushed first. Counters of other processes appear
+        after their next flush, at most :data:`FLUSH_INTERVAL` seconds later.
+
+        :return: Exposition text
+        """
+        self._flush()
+        sums = ', '.join(f"SUM(m.{name})" for name in COUNTER_FIELDS)
+        self.env.cr.execute(
+            f"""
+            SELECT p.internal_reference, p.name, r.name, m.status_class, {sums}
+            FROM api_manager_metrics m
+            JOIN api_manager_provider p ON p.id = m.provider_id
+            JOIN api_manager_request r ON r.id = m.request_id
+            GROUP BY p.internal_reference, p.name, r.name, m.status_class
+            ORDER BY p.internal_reference, r.name, m.status_class
+            """
+        )
+        samples = {
+            'requests_total': [],
+            'request_timeouts_total': [],
+            'request_retries_total': [],
+            'request_sent_bytes_total': [],
+            'request_received_bytes_total': [],
+            'request_duration_seconds': [],
+        }
+        for reference, provider_name, request_name, status, *counters in self.env.cr.fetchall():
+            values = dict(zip(COUNTER_FIELDS, counters))
+            labels = {
+                'provider': reference or provider_name or "",
+                'request': request_name or "",
+                'status_class': status,
+            }
+            samples['requests_total'].append(('', labels, values['count']))
+            samples['request_timeouts_total'].append(('', labels, values['timeouts']))
+            samples['request_retries_total'].append(('', labels, values['retries']))
+            samples['request_sent_bytes_total'].append(('', labels, values['bytes_sent']))
+            samples['request_received_bytes_total'].append(('', labels, values['bytes_received']))
+            cumulative = 0
+            for bound, name in zip(LATENCY_BUCKETS, BUCKET_FIELDS):
+                cumulative += values[name]
+                bucket_labels = dict(labels, le=str(bound))
+                samples['request_duration_seconds'].append(('_bucket', bucket_labels, cumulative))
+            samples['request_duration_seconds'].extend(
+                [
+                    ('_bucket', dict(labels, le='+Inf'), values['latency_count']),
+                    ('_sum', labels, values['latency_sum']),
+                    ('_count', labels, values['latency_count']),
+                ]
+            )
+        lines = []
+        for metric, metric_samples in samples.items():
+            kind = 'histogram' if metric == 'request_duration_seconds' else 'counter'
+            lines.append(f"# TYPE api_manager_{metric} {kind}")
+            for suffix, labels, value in metric_samples:
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"api_manager_{metric}{suffix}{{{label_text}}} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    """Escape Prometheus label value."""
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
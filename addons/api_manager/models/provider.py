@@ -1,8 +1,21 @@
 """Module for managing API Providers."""
 
-from odoo import _, api, fields, models
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Optional
+
+import requests
+from odoo import _, api, fields, models, SUPERUSER_ID
 from odoo.exceptions import ValidationError
 
+from ..utils import exceptions, rate_limiter
+from ..utils.circuit_breaker import OUTCOME_WINDOWS
+from ..utils.session_pool import SESSION_POOL, SessionConfig
+from .circuit_event import CIRCUIT_STATES
+
+# Wall clock, now() is frozen at the start of the transaction
+_NOW = "(clock_timestamp() AT TIME ZONE 'UTC')"
+
 
 class APIProvider(models.Model):
     """API Providers manager."""
@@ -56,6 +69,86 @@ class APIProvider(models.Model):
     token = fields.Char(store=True, default=None)
     dynamic_token = fields.Boolean("Is Dynamic Token")
     rel_companies = fields.Many2many('res.company', string="Related Companies")
+    session_pooling = fields.Boolean(
+        "Persistent Sessions",
+        default=True,
+        help="Reuse keep-alive connections to the server between requests of this worker.",
+    )
+    pool_connections = fields.Integer(
+        "Pool Connections", default=10, help="Number of connection pools to cache."
+    )
+    pool_maxsize = fields.Integer(
+        "Pool Max Size", default=10, help="Maximum number of connections kept in the pool."
+    )
+    pool_idle_timeout = fields.Integer(
+        "Idle Timeout (s)",
+        default=300,
+        help="Close pooled session when it wasn't used for this time. Zero means never.",
+    )
+    connect_timeout = fields.Float(
+        "Connect Timeout (s)", default=5, help="Maximum time to establish connection."
+    )
+    read_timeout = fields.Float(
+        "Read Timeout (s)", default=30, help="Maximum time to wait for data from the server."
+    )
+    max_retries = fields.Integer(
+        "Connection Retries",
+        default=5,
+        help="Number of retries when request doesn't reach the server, each attempt may take "
+        "up to the timeout.",
+    )
+    max_concurrency = fields.Integer(
+        "Max Concurrent Requests",
+        default=4,
+        help="Maximum of requests sent at once by batch execution in one worker.",
+    )
+    rate_limit = fields.Float(
+        "Requests per Second",
+        default=0,
+        help="Rate limit shared by all workers. Zero means no limit.",
+    )
+    rate_limit_burst = fields.Integer(
+        "Burst", default=1, help="Number of requests which may be sent at once after idle time."
+    )
+    rate_limit_policy = fields.Selection(
+        [('wait', "Wait"), ('reject', "Reject")],
+        string="When Exceeded",
+        default='wait',
+        required=True,
+        help="Wait: request is delayed until allowed, at most for Max Wait.\n"
+        "Reject: request fails immediately.",
+    )
+    rate_limit_max_wait = fields.Float("Max Wait (s)", default=10)
+    circuit_breaker = fields.Boolean(
+        "Circuit Breaker", help="Fail fast without sending requests while server is unhealthy."
+    )
+    circuit_state = fields.Selection(
+        CIRCUIT_STATES, string="Circuit State", default='closed', required=True, readonly=True
+    )
+    circuit_opened_at = fields.Datetime("Circuit Opened At", readonly=True)
+    circuit_error_rate = fields.Float(
+        "Error Rate Threshold (%)",
+        default=50,
+        help="Open circuit when this share of recent requests failed. Failed request didn't "
+        "reach the server, timed out, returned server error or exceeded latency threshold.",
+    )
+    circuit_latency = fields.Float(
+        "Latency Threshold (s)", default=0, help="Count slower requests as failed. Zero disables."
+    )
+    circuit_window = fields.Integer(
+        "Window Size", default=20, help="Number of recent requests evaluated by each worker."
+    )
+    circuit_min_calls = fields.Integer(
+        "Minimum Requests", default=10, help="Don't open circuit before this number of requests."
+    )
+    circuit_cooldown = fields.Integer(
+        "Cool-down (s)",
+        default=30,
+        help="Time after which open circuit lets one probe request through.",
+    )
+    circuit_event_ids = fields.One2many(
+        'api_manager.circuit_event', 'provider_id', string="Circuit History", readonly=True
+    )
 
     @api.depends('server_domain', 'server_scheme')
     def _compute_server_url(self):
@@ -69,3 +162,236 @@ class APIProvider(models.Model):
         for provider in self:
             if provider.server_domain[-1] == "/":
                 raise ValidationError(_("Server Domain cannot end with '/' character!"))
+
+    @api.constrains('pool_connections', 'pool_maxsize', 'pool_idle_timeout', 'max_concurrency')
+    def _check_session_pool(self):
+        """Validate session pool configuration."""
+        for provider in self:
+            if provider.pool_connections < 1 or provider.pool_maxsize < 1:
+                raise ValidationError(_("Pool sizes must be greater than zero!"))
+            if provider.max_concurrency < 1:
+                raise ValidationError(_("Max concurrent requests must be greater than zero!"))
+            if provider.pool_idle_timeout < 0:
+                raise ValidationError(_("Idle timeout cannot be negative!"))
+
+    @api.constrains('connect_timeout', 'read_timeout', 'max_retries')
+    def _check_timeouts(self):
+        """Validate timeouts."""
+        for provider in self:
+            if provider.connect_timeout <= 0 or provider.read_timeout <= 0:
+                raise ValidationError(_("Timeouts must be greater than zero!"))
+            if provider.max_retries < 0:
+                raise ValidationError(_("Connection retries cannot be negative!"))
+
+    @api.constrains('rate_limit', 'rate_limit_burst', 'rate_limit_max_wait')
+    def _check_rate_limit(self):
+        """Validate rate limit configuration."""
+        for provider in self:
+            if provider.rate_limit < 0 or provider.rate_limit_max_wait < 0:
+                raise ValidationError(_("Rate limit and max wait cannot be negative!"))
+            if provider.rate_limit and provider.rate_limit_burst < 1:
+                raise ValidationError(_("Burst must be greater than zero!"))
+
+    @api.constrains('circuit_error_rate', 'circuit_window', 'circuit_min_calls', 'circuit_cooldown')
+    def _check_circuit_breaker(self):
+        """Validate circuit breaker configuration."""
+        for provider in self:
+            if not 0 < provider.circuit_error_rate <= 100:
+                raise ValidationError(_("Error rate threshold must be between 0 and 100%!"))
+            if provider.circuit_window < 1 or provider.circuit_min_calls < 1:
+                raise ValidationError(_("Window size and minimum requests must be positive!"))
+            if provider.circuit_cooldown < 0:
+                raise ValidationError(_("Cool-down cannot be negative!"))
+
+    def _circuit_allow(self) -> bool:
+        """
+        Check if request to provider may be sent.
+
+        State is read from database in a fresh transaction, so circuit opened by any worker
+        (or by own transition, committed separately) is respected even by long transactions.
+        After cool-down one worker claims a probe, the circuit becomes half-open and other
+        requests fail until the probe outcome closes or opens it again.
+
+        :raises exceptions.CircuitOpen: While circuit doesn't allow requests
+        :return: True if request is a probe of half-open circuit
+        """
+        self.ensure_one()
+        if not self.circuit_breaker:
+            return False
+        with self.pool.cursor() as new_cr:
+            new_cr.execute(
+                f"""
+                SELECT circuit_state,
+                    GREATEST(%s - EXTRACT(EPOCH FROM {_NOW} - circuit_opened_at), 0)
+                FROM api_manager_provider WHERE id = %s
+                """,
+                (self.circuit_cooldown, self.id),
+            )
+            state, remaining = new_cr.fetchone()
+        if state == 'closed':
+            return False
+        if not remaining and self._circuit_transition('half_open', _("Probe request")):
+            return True
+        raise exceptions.CircuitOpen(self.name, remaining or self.circuit_cooldown)
+
+    def _circuit_record(self, failed: bool, probe: bool, reason: str = "") -> None:
+        """
+        Record outcome of request and open or close circuit when needed.
+
+        :param failed: True if request failed
+        :param probe: True if request was probe of half-open circuit
+        :param reason: Description of failure
+        """
+        self.ensure_one()
+        if not self.circuit_breaker:
+            return
+        key = (self.env.cr.dbname, self.id)
+        if probe:
+            OUTCOME_WINDOWS.reset(key)
+            if failed:
+                self._circuit_transition('open', _("Probe failed: %s") % reason)
+            else:
+                self._circuit_transition('closed', _("Probe succeeded"))
+            return
+        calls, error_rate = OUTCOME_WINDOWS.record(key, failed, self.circuit_window)
+        if calls >= self.circuit_min_calls and error_rate * 100 >= self.circuit_error_rate:
+            OUTCOME_WINDOWS.reset(key)
+            self._circuit_transition(
+                'open',
+                _("%.0f%% of last %s requests failed, last error: %s")
+                % (error_rate * 100, calls, reason),
+            )
+
+    def _circuit_transition(self, state: str, reason: str) -> bool:
+        """
+        Change circuit state in its own transaction and record the change.
+
+        Open and half-open circuit can be moved to half-open only after cool-down, so of all
+        workers trying at once only one succeeds.
+
+        :param state: New state
+        :param reason: Reason of the change
+
+        :return: True if state was changed
+        """
+        self.ensure_one()
+        with api.Environment.manage(), self.pool.cursor() as new_cr:
+            new_cr.execute(
+                f"""
+                SELECT circuit_state, circuit_opened_at <= {_NOW} - %s * interval '1 second'
+                FROM api_manager_provider WHERE id = %s FOR UPDATE
+                """,
+                (self.circuit_cooldown, self.id),
+            )
+            previous, cooled_down = new_cr.fetchone()
+            if state == 'half_open' and (previous == 'closed' or not cooled_down):
+                return False
+            if state != 'half_open' and previous == state:
+                return False
+            new_cr.execute(
+                f"""
+                UPDATE api_manager_provider
+                SET circuit_state = %s,
+                    circuit_opened_at = CASE WHEN %s = 'closed' THEN NULL ELSE {_NOW} END
+                WHERE id = %s
+                """,
+                (state, state, self.id),
+            )
+            if previous != state:
+                env = api.Environment(new_cr, SUPERUSER_ID, {})
+                env['api_manager.circuit_event'].create(
+                    {
+                        'provider_id': self.id,
+                        'from_state': previous,
+                        'to_state': state,
+                        'reason': reason[:255],
+                    }
+                )
+        self.invalidate_cache(['circuit_state', 'circuit_opened_at', 'circuit_event_ids'], self.ids)
+        return True
+
+    def action_circuit_reset(self):
+        """Close circuit manually."""
+        for provider in self:
+            OUTCOME_WINDOWS.reset((self.env.cr.dbname, provider.id))
+            provider._circuit_transition('closed', _("Manual reset"))  # pylint:disable=W0212
+
+    def _get_rate_limiter(self) -> Optional[Callable[[], float]]:
+        """
+        Return callable consuming one token of provider rate limit.
+
+        Returned callable doesn't use ORM, so it may be called from worker threads.
+
+        :return: Callable or None if provider isn't rate limited
+        """
+        self.ensure_one()
+        if not self.rate_limit:
+            return None
+        limit = rate_limiter.RateLimit(
+            name=self.name,
+            rate=self.rate_limit,
+            burst=self.rate_limit_burst,
+            max_wait=self.rate_limit_max_wait if self.rate_limit_policy == 'wait' else 0,
+        )
+        return partial(rate_limiter.acquire, self.pool, self.id, limit)
+
+    def _get_session_config(self) -> SessionConfig:
+        """Return configuration of HTTP session for provider."""
+        self.ensure_one()
+        return SessionConfig(
+            scheme=self.server_scheme,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            idle_timeout=self.pool_idle_timeout,
+            max_retries=self.max_retries,
+        )
+
+    def _session_keys(self):
+        """Return keys of pooled sessions of provider, with and without connection retries."""
+        self.ensure_one()
+        key = (self.env.cr.dbname, self.id)
+        return [key, key + ('no_retries',)]
+
+    @contextmanager
+    def _session(self, retries=True):
+        """
+        Yield HTTP session for provider.
+
+        Pooled session is shared by all requests of provider in current process and stays open
+        after use, it doesn't keep cookies between requests. Without pooling a new session
+        is created and closed on exit.
+
+        :param retries: Retry connection errors in adapter, callers with deadline retry
+            by themselves to check remaining time before each attempt
+        """
+        self.ensure_one()
+        config = self._get_session_config()
+        key, no_retries_key = self._session_keys()
+        if not retries:
+            config = config._replace(max_retries=0)
+            key = no_retries_key
+        if not self.session_pooling:
+            with SESSION_POOL.build_session(config) as session:
+                yield session
+            return
+        with SESSION_POOL.lease(key, config) as session:
+            try:
+                yield session
+            except requests.exceptions.ConnectionError:
+                # Drop possibly broken connections, next request will start with fresh session
+                SESSION_POOL.discard(key)
+                raise
+
+    def write(self, vals):  # pylint:disable=W8106
+        """Invalidate compiled request specs of provider requests."""
+        res = super(APIProvider, self).write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        """Close pooled sessions of deleted providers."""
+        keys = [key for provider in self for key in provider._session_keys()]
+        res = super(APIProvider, self).unlink()
+        for key in keys:
+            SESSION_POOL.discard(key)
+        return res
@@ -0,0 +1,21 @@
+"""Module for API Provider rate limit state."""
+
+from odoo import fields, models
+
+
+class APIRateLimit(models.Model):
+    """Token bucket of provider, updated only by :mod:`..utils.rate_limiter`."""
+
+    _name = 'api_manager.rate_limit'
+    _description = "Rate Limit Bucket"
+    _log_access = False
+
+    provider_id = fields.Many2one(
+        'api_manager.provider', string="Provider", required=True, ondelete='cascade'
+    )
+    tokens = fields.Float(required=True)
+    updated_at = fields.Datetime(required=True)
+
+    _sql_constraints = [
+        ('provider_uniq', 'unique (provider_id)', "Provider can have only one rate limit bucket!"),
+    ]
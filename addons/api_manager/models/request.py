@@ -1,21 +1,32 @@
 """Module for managing API Requests."""
 __version__ = "1.2"
 
-import json
 import logging
-import re
+import random
 import time
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
-from urllib.parse import quote_plus as url_encode
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import quote_plus as url_encode, urlsplit
 
 import requests
-from odoo import _, api, fields, models, SUPERUSER_ID
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import ValidationError
 
+from ..utils import batch, exceptions, json_codec, json_stream, log_filter
+from ..utils.metrics import transferred_bytes
+from ..utils.request_spec import compile_spec, RequestSpec, SLOT_PATTERN
+
 LOG_ORIGIN = __name__
 _logger = logging.getLogger(LOG_ORIGIN)
 
+# Keywords controlling retries, they are not stored with the scheduled request
+RETRY_KEYWORDS = ('retry_on_error', 'attempt', 'max_attempts', 'backoff_factor', 'deadline')
+# Keywords of the caller's result, retry cron only needs success and would never consume
+# or close a streamed response
+RESULT_KEYWORDS = ('return_type', 'stream_key')
+
 
 # pylint: disable=R0902
 class APIRequest(models.Model):
@@ -32,12 +43,17 @@ class APIRequest(models.Model):
     _query = ""
     _parametrized = False
     _cookies = None
+    _decoded = None
+    _retry_after = 0
+    _elapsed = None
+    _timing = None
 
     response = None
     error = None
     message = None
     status_code = None
     success = False
+    timed_out = False
 
     @property
     def headers(self):
@@ -127,6 +143,12 @@ class APIRequest(models.Model):
         ],
     )
     parametrized_url = fields.Boolean("Parametrized", compute='_compute_parametrized', store=True)
+    connect_timeout = fields.Float(
+        "Connect Timeout (s)", default=0, help="Overrides provider timeout when set."
+    )
+    read_timeout = fields.Float(
+        "Read Timeout (s)", default=0, help="Overrides provider timeout when set."
+    )
 
     @api.depends('provider', 'name')
     def _compute_record_path(self) -> None:
@@ -138,7 +160,7 @@ class APIRequest(models.Model):
     def _compute_parametrized(self) -> None:
         """Compute nested name for record from provider name."""
         for request in self:
-            request.parametrized_url = bool(re.search(r'{[^}]*}', request.url_path))
+            request.parametrized_url = bool(SLOT_PATTERN.search(request.url_path))
 
     @api.constrains('payload')
     def _check_valid_json(self) -> None:
@@ -152,13 +174,46 @@ class APIRequest(models.Model):
         for request in self:
             if request.payload:
                 try:
-                    json.loads(request.payload)
+                    payload = json_codec.loads(request.payload)
                 except ValueError as exc:
                     _logger.error("Payload is not valid JSON!")
                     raise ValidationError(_("Payload is not valid JSON!")) from exc
+                if not isinstance(payload, dict):
+                    raise ValidationError(_("Payload must be JSON object!"))
+
+    def write(self, vals):  # pylint:disable=W8106
+        """Invalidate compiled request specs."""
+        res = super(APIRequest, self).write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        """Invalidate compiled request specs."""
+        res = super(APIRequest, self).unlink()
+        self.clear_caches()
+        return res
 
     # --- PREPARE REQUEST --- #
 
+    @tools.ormcache('self.id')
+    def _get_request_spec(self) -> RequestSpec:
+        """
+        Return request compiled into immutable template.
+
+        Spec is cached per record and invalidated whenever request or provider is changed.
+        """
+        self.ensure_one()
+        return compile_spec(
+            self.method,
+            f"{self.provider.server_url}{self.url_path}",
+            self.payload,
+            self.content_type,
+            (
+                self.connect_timeout or self.provider.connect_timeout,
+                self.read_timeout or self.provider.read_timeout,
+            ),
+        )
+
     def _set_authentication(self) -> Optional[requests.auth.AuthBase]:
         """Return authentication method or set appropriate headers."""
         auth_method = self.provider.authentication_method
@@ -180,98 +235,63 @@ class APIRequest(models.Model):
         """
         Get authentication values for request based on company and provider.
 
-        Authentication values such a token, username, password are stored in model api_manager.request_parameter.
-        In case it doesn't exist, return default value stored on provider model.
+        Authentication values such a token, username, password are stored in model
+        api_manager.request_parameter and cached. In case it doesn't exist, return default value stored on provider model.
 
         :param values: list of authentication fields
 
         :return: list of credentials
         """
         res = []
+        request_parameter = self.env['api_manager.request_parameter']
         for val in values:
-            rel_kv = self.env['api_manager.request_parameter'].search(
-                [
-                    ('provider', '=', self.provider.id),
-                    ('key', '=', val),
-                    ('company_id', '=', self.env.company.id),
-                ]
-            )
-            if rel_kv:
-                if not rel_kv.value:
-                    msg = f"Value is not set for key/value {rel_kv.id}"
-                    raise ValidationError(_(msg))
-                res.append(rel_kv.value)
-            else:
+            value = request_parameter.get_value(self.provider, val)
+            if value is None:
                 res.append(getattr(self.provider, val))
+            elif not value:
+                msg = f"Value is not set for key/value {self.provider.name} / {val}"
+                raise ValidationError(_(msg))
+            else:
+                res.append(value)
         return res
 
-    @staticmethod
-    def _get_parametrized_query(query, params: Dict[str, str]) -> str:
-        """
-        Replace parameters in query path with dictionary data.
-
-        :param query: Original query
-        :param params: Data to replace 'key' with 'value' in query
-
-        :return: Modified query
-        """
-        for key, value in params.items():
-            query = re.sub(key, value, query)
-        return query
-
     def _get_query_wth_args(self, query, args: Dict[str, str]) -> str:
         """
-        Replace parameters in query path with dictionary data.
+        Add arguments to query.
 
         :param query: Original query
-        :param params: Data to replace 'key' with 'value' in query
+        :param args: Data to add as 'key=value' query arguments
 
         :return: Modified query
         """
         args = {**args, **self._query_args}
-        for key, value in args.items():
-            query += ("&" if self._parametrized else "?") + key + "=" + value
-            self._parametrized = True
-        return query
-
-    def _get_payload(self, data: Union[Dict, List]) -> Union[dict, list]:
-        """
-        Prepare request payload data.
+        if not args:
+            return query
+        separator = "&" if self._parametrized or "?" in query else "?"
+        self._parametrized = True
+        return query + separator + "&".join(f"{key}={value}" for key, value in args.items())
 
-        :param data: Hardcoded data from caller
-        :return: Union[Dict, List]
-        """
-        override = self.payload or "{}"
-        payload = json.loads(override)
-        if isinstance(data, list):  # pylint:disable=R1705
-            payload_list = []
-            for item in data:
-                payload_list.append({**item, **payload})
-            return payload_list
-        else:
-            return {**data, **payload}
-
-    def _prepare_headers(self, headers: dict):
+    def _prepare_headers(self, spec: RequestSpec, headers: dict):
         """
         Prepare headers with content type and custom data.
 
+        :param spec: Compiled request
         :param headers: Dictionary containing new headers
         """
-        if not self._headers.get('Content-Type') and self.content_type:
-            self._headers['Content-Type'] = self.content_type
-        for key, value in headers.items():
-            self._headers[key] = value
+        for key, value in spec.headers:
+            self._headers.setdefault(key, value)
+        self._headers.update(headers)
 
-    def _prepare_url(self, params, args, encode=False):
+    def _prepare_url(self, spec: RequestSpec, params, args, encode=False):
         """
         Prepare url with new parameters and arguments data.
 
+        :param spec: Compiled request
         :param params: Dictionary containing new parameters
         :param args: Dictionary containing new arguments
-        :param args: Should url be encoded by basic library?
+        :param encode: Should url be encoded by basic library?
         """
-        query = f"{self.provider.server_url}{self.url_path}"
-        query = self._get_parametrized_query(query, params)
+        query = spec.fill_url(params)
         query = self._get_query_wth_args(query, args)
         self._query = url_encode(query) if encode else query
 
@@ -283,51 +303,107 @@ class APIRequest(models.Model):
         :keyword headers: Dict[str, str]: Headers
             |  See method `_prepare_headers`
         :keyword params: Dict[str, str]: Path parameters
-            |  See method `_get_parametrized_query`
+            |  See method `RequestSpec.fill_url`
         :keyword args: Dict[str,str]: Query arguments
             |  See method `_get_query_wth_args`
         :keyword data: Union[Dict, List]: Request body
-            |  See method `_get_payload`
+            |  See method `RequestSpec.merge_payload`
 
         :return: Request data
         """
+        spec = self._get_request_spec()
         self._auth_method = self._set_authentication()
-        self._prepare_headers(kwargs.get('headers', {}))
+        self._prepare_headers(spec, kwargs.get('headers', {}))
         self._prepare_url(
-            kwargs.get('params', {}), kwargs.get('args', {}), kwargs.get('urlsafe', False)
+            spec, kwargs.get('params', {}), kwargs.get('args', {}), kwargs.get('urlsafe', False)
         )
-        self._data = self._get_payload(kwargs.get('data', {}))
-        data_key = 'json' if self.content_type == 'application/json' else 'data'
+        self._data = spec.merge_payload(kwargs.get('data', {}))
         request_args = {
-            'method': self.method.lower(),
+            'method': spec.method,
             'auth': self._auth_method,
             'headers': self._headers,
             'url': self._query,
             'cookies': self._cookies,
-            data_key: self._data,
+            'timeout': spec.timeout,
+            spec.data_key: self._data,
         }
 
         return request_args
 
     # --- PROCESS REQUEST --- #
 
-    def _send_request(self, request_data: Dict[str, Any]):
+    @staticmethod
+    def deadline_after(seconds: float) -> float:
+        """
+        Return deadline for `deadline` keyword of :func:`send_request`.
+
+        Same deadline may be passed to several requests to limit their total duration.
+
+        :param seconds: Latency budget in seconds
+        :return: Deadline as value of :func:`time.monotonic`
+        """
+        return time.monotonic() + seconds
+
+    def _send_request(self, request_data: Dict[str, Any], deadline: Optional[float] = None):
         """
         Send request with prepared data.
 
         :param request_data: Request Data
+        :param deadline: Value of :func:`time.monotonic` until request must be finished
+
+        :raises exceptions.DeadlineExceeded: If deadline passed before request was sent
         """
-        with requests.Session() as session:
-            retries = 5
-            # This doesn't retry on status codes, only if request doesn't reach the server!
-            retry = requests.adapters.Retry(
-                total=retries, read=retries, connect=retries, backoff_factor=0.1
-            )
-            http_adapter = requests.adapters.HTTPAdapter(max_retries=retry)
-            session.mount(self.provider.server_scheme, http_adapter)
-            self.response = session.request(**request_data)
+        self._decoded = None
+        self._elapsed = None
+        if self._timing is None:
+            self._timing = {}
+        start = time.monotonic()
+        limiter = self.provider._get_rate_limiter()  # pylint:disable=W0212
+        if limiter:
+            limiter()
+        self._timing['wait'] = time.monotonic() - start
+        if deadline is not None and deadline <= time.monotonic():
+            raise exceptions.DeadlineExceeded(self.name)
+        start = time.monotonic()
+        try:
+            if deadline is None:
+                with self.provider._session() as session:  # pylint:disable=W0212
+                    self.response = session.request(**json_codec.encode_body(request_data))
+            else:
+                self.response = self._send_until(request_data, deadline)
+        finally:
+            self._elapsed = time.monotonic() - start
+        self._timing.update(self._get_response_timing(self.response, self._elapsed))
+        # Streamed body is consumed by caller, read it only to report an error
+        if not request_data.get('stream') or self.response.status_code // 200 != 1:
             self.message = self.response.text
 
+    def _send_until(self, request_data: Dict[str, Any], deadline: float):
+        """
+        Send request with timeouts shortened to meet deadline and return the response.
+
+        Connection errors are retried here instead of in the HTTP adapter, up to the provider
+        number of retries, and only while there is time left before deadline.
+
+        :param request_data: Request Data
+        :param deadline: Value of :func:`time.monotonic` until request must be finished
+        :raises requests.exceptions.ConnectionError: Of the last attempt
+        :return: requests.Response
+        """
+        request_data = dict(json_codec.encode_body(request_data))
+        timeout = request_data['timeout']
+        retries = self.provider.max_retries
+        while True:
+            remaining = deadline - time.monotonic()
+            request_data['timeout'] = tuple(min(value, remaining) for value in timeout)
+            try:
+                with self.provider._session(retries=False) as session:  # pylint:disable=W0212
+                    return session.request(**request_data)
+            except requests.exceptions.ConnectionError:
+                if retries <= 0 or deadline - time.monotonic() <= 0:
+                    raise
+                retries -= 1
+
     def send_request(self, **kwargs) -> Any:
         """
         Send request and return response.
@@ -339,70 +415,271 @@ class APIRequest(models.Model):
         :keyword args: Dict[key,value]: Query arguments
             ..  add 'key'='value' to query arguments
         :keyword data: Union[Dict[], List]: Request body
+        :keyword retry_on_error: bool: Schedule failed request for deferred retry
+            |  See method `_retry_request`
+        :keyword return_type: str: What to return on success
+            |  'success', 'decoded', 'stream' or name of attribute, e.g. 'status_code'
+        :keyword stream_key: str: Key of JSON array yielded by 'stream' return type
+            |  See method `iter_response_items`
+        :keyword deadline: float: Deadline of the request, timeouts are shortened to meet it
+            |  See method `deadline_after`, no retry is scheduled once deadline passed
+        :keyword attempt: int: Index of the attempt, requests with attempt > 1 count as retries
+        :keyword correlation_key: Union[str, List[str]]: Business references stored with the log
+            |  See method `api_manager.logger.search_logs`
 
         :return: True if request successful, else False
         """
 
-        self.log_request(LOG_ORIGIN)
+        start = time.monotonic()
         request_data = self.get_request_data(**kwargs)
+        self._timing = {'prepare': time.monotonic() - start}
+        if kwargs.get('return_type') == 'stream':
+            request_data['stream'] = True
+        probe = False
         try:
-            self._send_request(request_data)
+            probe = self.provider._circuit_allow()  # pylint:disable=W0212
+            self._send_request(request_data, kwargs.get('deadline'))
             self._set_status_code()
             self.success = self.status_code // 200 == 1
-        except (requests.exceptions.HTTPError, requests.exceptions.Timeout):
-            result = self._retry_request(**kwargs)
-            if result is not None:
-                # If no retry available return previous data
-                return result
-        except requests.exceptions.ConnectionError as error:
-            # TODO - Connection issue - Store request in Queue and retry after some time.
+        except requests.exceptions.Timeout as error:
             self._set_error(error)
+            self.timed_out = True
         except requests.exceptions.RequestException as error:
-            # Any other request error. Raise Exceptions manually after send_request call!
+            # Any request error. Raise Exceptions manually after send_request call!
             self._set_error(error)
+        except exceptions.DeadlineExceeded as error:
+            self.message = error.name
+            self.status_code = False
+            self.timed_out = True
+        except (exceptions.RateLimitExceeded, exceptions.CircuitOpen) as error:
+            # Request wasn't sent at all
+            self.message = error.name
+            self.status_code = False
+            self._retry_after = error.retry_after
+        if self._elapsed is not None:
+            failed, reason = self._get_failure(self.status_code, self._elapsed, self.message)
+            self.provider._circuit_record(failed, probe, reason)  # pylint:disable=W0212
+        self.env['api_manager.metrics']._observe(  # pylint:disable=W0212
+            self,
+            self.status_code,
+            self._elapsed,
+            self.response if self.response is not None else self.error,
+            self.timed_out,
+            kwargs.get('attempt', 1) > 1,
+        )
+        if not self.success:
+            self._retry_request(**kwargs)
 
-        return self._get_return_value(kwargs.get('return_type', 'success'))
+        return_type = kwargs.get('return_type', 'success')
+        start = time.monotonic()
+        result = self._get_return_value(return_type, kwargs.get('stream_key'))
+        if return_type == 'decoded':
+            self._timing['decode'] = time.monotonic() - start
+        self._log_exchange(
+            request_data,
+            self.status_code,
+            self.response if self.response is not None else self.error,
+            None if self.success else self.message,
+            dict(self._timing, total=self._elapsed),
+            kwargs,
+        )
+        return result
 
-    def _retry_request(self, **kwargs):
+    def send_requests_batch(
+        self, calls: List[Dict[str, Any]], max_workers: Optional[int] = None
+    ) -> List[batch.BatchResult]:
         """
-        Retry request based on status code and available attempts.
+        Send many requests concurrently and return their results in input order.
 
-        :keyword retry_on_error: bool: True if request should by retried
-        :keyword attempt: int: Current retry attempt index.
-        :keyword max_attempts: int: Maximum number of attempts to retry.
-        :keyword retry_on_http_error: Tuple[int]: Maximum number of attempts to retry.
-        :keyword backoff_factor: int: See:
-            https://urllib3.readthedocs.io/en/stable/reference/urllib3.util.html.
+        Requests are prepared and logged one by one in current thread, only network I/O runs
+        in worker threads. Number of requests in flight is bounded by the provider limit,
+        which is shared by all batches of the provider in current process.
+
+        :param calls: List of keyword dictionaries, see :func:`get_request_data`
+        :param max_workers: Maximum of requests in flight, provider limit is used when not set
+
+        :return: List of :class:`BatchResult`, failed requests don't raise
+        """
+        self.ensure_one()
+        if not calls:
+            return []
+        provider = self.provider
+        try:
+            probe = provider._circuit_allow()  # pylint:disable=W0212
+        except exceptions.CircuitOpen as error:
+            return [batch.BatchResult(False, False, None, None, error.name)] * len(calls)
+        prepared, prepare_times = [], []
+        for call in calls:
+            self.clear()
+            start = time.monotonic()
+            prepared.append(self.get_request_data(**call))
+            prepare_times.append(time.monotonic() - start)
+        self.clear()
+
+        workers = min(max_workers or provider.max_concurrency, provider.max_concurrency)
+        semaphore = batch.provider_semaphore(
+            (self.env.cr.dbname, provider.id), provider.max_concurrency
+        )
+        limiter = provider._get_rate_limiter()  # pylint:disable=W0212
+        with provider._session() as session:  # pylint:disable=W0212
+            with ThreadPoolExecutor(max_workers=min(workers, len(prepared))) as executor:
+                futures = [
+                    executor.submit(batch.execute, session, semaphore, request_data, limiter)
+                    for request_data in prepared
+                ]
+                results = [future.result() for future in futures]
+        metrics = self.env['api_manager.metrics']
+        for call, request_data, prepare, result in zip(calls, prepared, prepare_times, results):
+            metrics._observe(  # pylint:disable=W0212
+                self, result.status_code, result.elapsed, result.response, result.timed_out
+            )
+            timing = self._get_response_timing(result.response, result.elapsed)
+            self._log_exchange(
+                request_data,
+                result.status_code,
+                result.response,
+                result.error,
+                dict(timing, prepare=prepare, total=result.elapsed),
+                call,
+            )
+            if result.elapsed is None:
+                continue
+            failed, reason = self._get_failure(result.status_code, result.elapsed, result.error)
+            provider._circuit_record(failed, probe, reason)  # pylint:disable=W0212
+            probe = False
+        return results
+
+    def _get_failure(self, status_code, elapsed: float, message) -> tuple:
+        """
+        Evaluate if remote server failed to handle request, used by circuit breaker.
+
+        Client errors (4xx) are not failures of the server.
+
+        :param status_code: Response status code or False if there is no response
+        :param elapsed: Duration of request in seconds
+        :param message: Error message
 
-        :return: None if request shouldn't be retried else see :func:`send_request`.
+        :return: tuple(failed, reason)
         """
-        if not kwargs.get('retry_on_error', False):
-            return None
+        if not status_code:
+            return True, message or _("No response")
+        if status_code >= 500:
+            return True, _("Status code %s") % status_code
+        latency = self.provider.circuit_latency
+        if latency and elapsed > latency:
+            return True, _("Request took %.2fs") % elapsed
+        return False, ""
+
+    def _retry_request(self, **kwargs) -> bool:
+        """
+        Schedule failed request for deferred retry based on status code.
+
+        Request is stored in api_manager.request_retry in its own transaction and sent again
+        by cron, so the caller is never blocked. Delay grows exponentially with random jitter
+        and is never shorter than server's 'Retry-After' header.
+
+        :keyword retry_on_error: bool: True if request should by retried
+        :keyword max_attempts: int: Maximum number of attempts including the first one.
+        :keyword retry_on_http_error: Tuple[int]: Status codes which should be retried,
+            429 Too Many Requests is retried always.
+        :keyword backoff_factor: float: Delay of first retry in seconds.
 
-        attempt = kwargs.get('attempt', 1)
+        :return: True if retry was scheduled
+        """
+        if not kwargs.get('retry_on_error', False) or not self._is_retryable(kwargs):
+            return False
+        deadline = kwargs.get('deadline')
+        if deadline is not None and deadline <= time.monotonic():
+            # Caller already gave up, request mustn't be repeated behind its back
+            return False
         max_attempts = kwargs.get('max_attempts', 5)
-        if attempt > max_attempts:
-            return None
-        whitelisted_codes = kwargs.get('retry_on_http_error', tuple(range(400, 600)))
-        if self.status_code not in whitelisted_codes:
-            return None
+        if max_attempts <= 1:
+            return False
+        try:
+            request_kwargs = json_codec.dumps_str(
+                {
+                    key: value
+                    for key, value in kwargs.items()
+                    if key not in RETRY_KEYWORDS + RESULT_KEYWORDS
+                }
+            )
+        except TypeError:
+            _logger.error("Request %s cannot be retried, data are not serializable.", self.name)
+            return False
 
         backoff_factor = kwargs.get("backoff_factor", 1)
-        time.sleep(backoff_factor * (2 ** (attempt - 1)))  # Wait before next retry
-        kwargs["attempt"] = attempt + 1
-        return self.send_request(**kwargs)
+        delay = self._get_retry_delay(1, backoff_factor)
+        with api.Environment.manage(), self.pool.cursor() as new_cr:
+            self.env(cr=new_cr, su=True)['api_manager.request_retry'].create(
+                {
+                    'request_id': self.id,
+                    'company_id': self.env.company.id,
+                    'request_kwargs': request_kwargs,
+                    'max_attempts': max_attempts,
+                    'backoff_factor': backoff_factor,
+                    'next_attempt_at': fields.Datetime.now() + timedelta(seconds=delay),
+                    'last_status_code': self.status_code or 0,
+                    'last_error': self.message,
+                }
+            )
+        _logger.info("Request %s scheduled for retry in %.1f seconds.", self.name, delay)
+        return True
+
+    def _is_retryable(self, kwargs) -> bool:
+        """
+        Check if failed request may be retried.
+
+        :param kwargs: Request keywords, see :func:`_retry_request`
+        :return: True when request didn't reach the server or status code is whitelisted
+        """
+        if not self.status_code:
+            return True
+        whitelisted_codes = kwargs.get('retry_on_http_error', tuple(range(400, 600)))
+        return self.status_code == 429 or self.status_code in whitelisted_codes
+
+    def _get_retry_delay(self, attempt: int, backoff_factor: float) -> float:
+        """
+        Compute delay in seconds before next attempt.
+
+        :param attempt: Index of failed attempt
+        :param backoff_factor: Delay of first retry in seconds
+
+        :return: Exponential delay with jitter, at least 'Retry-After' of last response
+        """
+        delay = backoff_factor * (2 ** (attempt - 1))
+        delay += random.uniform(0, delay)  # Jitter spreads retries of requests failed together
+        return max(delay, self._get_retry_after())
+
+    def _get_retry_after(self) -> float:
+        """Return seconds from 'Retry-After' header of last response or rate limiter or 0."""
+        response = self.response if self.response is not None else self.error
+        value = getattr(response, 'headers', {}).get('Retry-After')
+        if not value:
+            return self._retry_after
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return 0
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
 
     # --- PROCESS RESPONSE --- #
 
-    def _get_return_value(self, return_type):
+    def _get_return_value(self, return_type, stream_key=None):
         if return_type == 'decoded':
             return self.decode_response()
+        if return_type == 'stream':
+            return self.iter_response_items(stream_key) if self.success else False
         return getattr(self, return_type, self.success) if self.success else False
 
     def _set_error(self, error):
         """Set Error with data from exception."""
         self.error = error.response
         self.message = str(error)
+        self.status_code = getattr(error.response, 'status_code', False)
 
     def _set_status_code(self):
         """Set status code with response code if exists else False."""
@@ -412,11 +689,18 @@ class APIRequest(models.Model):
         """
         Return json response.
 
+        Response is decoded only once, following calls return the same object.
+
         :return: Dictionary representing JSON data or empty dict
         """
+        if self._decoded is not None:
+            return self._decoded
+        if self.response is None:
+            return {}
         try:
-            return self.response.json()
-        except json.decoder.JSONDecodeError:
+            self._decoded = json_codec.loads(self.response.content)
+            return self._decoded
+        except json_codec.DecodeError:
             _logger.debug(
                 "Response is not JSON: %s",
                 {
@@ -427,21 +711,103 @@ class APIRequest(models.Model):
             )
         return {}
 
-    def log_request(self, origin=None):
-        """Log outgoing requests to api_manager.logger."""
-        self.env['api_manager.logger'].with_user(SUPERUSER_ID).sudo().create(
+    def iter_response_items(self, key: Optional[str] = None) -> Iterator[Any]:
+        """
+        Yield items of JSON array from streamed response without loading whole body.
+
+        Connection is released when iterator is exhausted or closed. Current response is
+        bound immediately, later requests of the record don't change iterated items.
+
+        :param key: Key of the array in JSON object, response must be array if not set
+        :return: Iterator of decoded items
+        """
+        return self._iter_items(self.response, key)
+
+    @staticmethod
+    def _iter_items(response, key: Optional[str]) -> Iterator[Any]:
+        """Yield items of JSON array from streamed response, close response at the end."""
+        try:
+            yield from json_stream.iter_array(
+                response.iter_content(chunk_size=json_stream.CHUNK_SIZE),
+                key=key,
+                encoding=response.encoding or 'utf-8',
+            )
+        finally:
+            response.close()
+
+    @staticmethod
+    def _get_response_timing(response, elapsed: Optional[float]) -> Dict[str, float]:
+        """
+        Split duration of request into phases.
+
+        'server' is time from sending the request until response headers were parsed,
+        including connection setup if no pooled connection was available.
+        'transfer' is time of reading the body, streamed body is read later by caller.
+
+        :param response: requests.Response or None
+        :param elapsed: Duration of request in seconds or None if request wasn't sent
+        :return: Dictionary of phase durations in seconds
+        """
+        if response is None or elapsed is None or response.elapsed is None:
+            return {}
+        server = response.elapsed.total_seconds()
+        return {'server': server, 'transfer': max(elapsed - server, 0)}
+
+    def _log_exchange(  # pylint:disable=too-many-arguments
+        self, request_data: Dict[str, Any], status_code, response, message, timing, kwargs
+    ):
+        """
+        Log completed exchange to api_manager.logger as single entry.
+
+        :param request_data: Prepared request, see :func:`get_request_data`
+        :param status_code: Response status code or False if there is no response
+        :param response: requests.Response or None
+        :param message: Error message or None
+        :param timing: Duration of phases in seconds
+        :param kwargs: Keywords of :func:`send_request`
+        """
+        bytes_sent, bytes_received = transferred_bytes(response)
+        success = bool(status_code) and status_code // 200 == 1
+        url = request_data['url']
+        self.env['api_manager.logger'].log(
+            LOG_ORIGIN,
+            "outgoing",
             {
-                'created_at': datetime.now(),
-                'origin': origin or LOG_ORIGIN,
-                'direction': "outgoing",
-                'data': {
-                    "headers": self._headers,
-                    "cookies": self._cookies,
-                    "data": self._data,
-                },
-            }
+                "request": self.name,
+                "method": request_data['method'],
+                # Query string may contain auth token, only arguments of caller are logged
+                "url": url.split('?', 1)[0],
+                "args": kwargs.get('args', {}),
+                "headers": self._redact_auth_headers(request_data['headers']),
+                "cookies": request_data['cookies'],
+                "data": request_data.get('json', request_data.get('data')),
+                "status_code": status_code,
+                "message": message,
+                "bytes_sent": bytes_sent,
+                "bytes_received": bytes_received,
+                "timing": timing,
+                "attempt": kwargs.get('attempt', 1),
+            },
+            failed=not success,
+            endpoint=urlsplit(url).path,
+            request=self,
+            status_code=status_code,
+            correlation_key=kwargs.get('correlation_key'),
+            elapsed=timing.get('total'),
         )
 
+    def _redact_auth_headers(self, headers) -> Dict[str, Any]:
+        """
+        Return copy of headers with credentials added by :func:`_set_authentication` masked.
+
+        Masked regardless of log policy, token header of provider may have any name.
+        """
+        secret = {'authorization', (self.provider.key or '').lower()}
+        return {
+            name: log_filter.REDACTED if name.lower() in secret else value
+            for name, value in (headers or {}).items()
+        }
+
     def clear(self):
         """Clear all cached data in current instance."""
         self._headers = {}
@@ -451,9 +817,14 @@ class APIRequest(models.Model):
         self._query = ""
         self._parametrized = False
         self._cookies = None
+        self._decoded = None
+        self._retry_after = 0
+        self._elapsed = None
+        self._timing = None
 
         self.response = None
         self.error = None
         self.message = None
         self.status_code = None
         self.success = False
+        self.timed_out = False
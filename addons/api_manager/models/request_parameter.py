@@ -2,9 +2,9 @@
 
 from collections import defaultdict
 from itertools import product
-from typing import Dict, Generator
+from typing import Dict, Generator, Optional
 
-from odoo import fields, models
+from odoo import api, fields, models, tools
 
 
 class APIRequestParameter(models.Model):
@@ -22,6 +22,52 @@ class APIRequestParameter(models.Model):
         ('key_val_uniq', 'unique (provider, key, company_id)', "This combination exists already!"),
     ]
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        """Invalidate cached parameter values."""
+        res = super(APIRequestParameter, self).create(vals_list)
+        self.clear_caches()
+        return res
+
+    def write(self, vals):  # pylint:disable=W8106
+        """Invalidate cached parameter values."""
+        res = super(APIRequestParameter, self).write(vals)
+        self.clear_caches()
+        return res
+
+    def unlink(self):
+        """Invalidate cached parameter values."""
+        res = super(APIRequestParameter, self).unlink()
+        self.clear_caches()
+        return res
+
+    @api.model
+    def get_value(self, provider, key: str, company=None) -> Optional[str]:
+        """
+        Return parameter value for provider and company.
+
+        Values are cached per (provider, company, key), cache is invalidated whenever
+        a parameter or provider is changed.
+
+        :param provider: api_manager.provider record
+        :param key: Parameter key
+        :param company: res.company record, current company is used when not set
+
+        :return: Parameter value or None if parameter doesn't exist
+        """
+        company = company or self.env.company
+        return self.sudo()._get_cached_value(provider.id, company.id, key)
+
+    @api.model
+    @tools.ormcache('provider_id', 'company_id', 'key')
+    def _get_cached_value(self, provider_id: int, company_id: int, key: str) -> Optional[str]:
+        """Return parameter value or None, see :func:`get_value`."""
+        param = self.search(
+            [('provider', '=', provider_id), ('key', '=', key), ('company_id', '=', company_id)],
+            limit=1,
+        )
+        return param.value if param else None
+
     def get_groups_by_key(self) -> Dict[str, set]:
         """Return grouped recordset by keys without duplicate values."""
         grouped = defaultdict(set)
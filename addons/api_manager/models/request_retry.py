@@ -0,0 +1,102 @@
+"""Module for deferred retries of failed API Requests."""
+
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+from ..utils import json_codec
+
+LOG_ORIGIN = __name__
+_logger = logging.getLogger(LOG_ORIGIN)
+
+
+class APIRequestRetry(models.Model):
+    """Failed request waiting for next attempt."""
+
+    _name = 'api_manager.request_retry'
+    _description = "Request Retry"
+    _order = 'next_attempt_at, id'
+
+    request_id = fields.Many2one(
+        'api_manager.request', string="Request", required=True, ondelete='cascade'
+    )
+    company_id = fields.Many2one('res.company', string="Company")
+    request_kwargs = fields.Text("Request Data", required=True)
+    attempt = fields.Integer(
+        default=1, required=True, help="Index of the attempt which failed most recently."
+    )
+    max_attempts = fields.Integer(default=5, required=True)
+    backoff_factor = fields.Float(default=1, required=True)
+    next_attempt_at = fields.Datetime(index=True, required=True)
+    state = fields.Selection(
+        [
+            ('pending', 'Pending'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        default='pending',
+        required=True,
+        index=True,
+    )
+    last_status_code = fields.Integer("Last Status Code")
+    last_error = fields.Text()
+
+    @api.model
+    def _process_due(self, limit=100):
+        """
+        Send requests whose next attempt is due.
+
+        Rows are locked with SKIP LOCKED, so several workers may drain the table at once.
+
+        :param limit: Maximum of retries processed in one run
+        """
+        self.env.cr.execute(
+            """
+            SELECT id FROM api_manager_request_retry
+            WHERE state = 'pending' AND next_attempt_at <= %s
+            ORDER BY next_attempt_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (fields.Datetime.now(), limit),
+        )
+        for retry in self.browse([row[0] for row in self.env.cr.fetchall()]):
+            try:
+                with self.env.cr.savepoint():
+                    retry._execute()  # pylint:disable=W0212
+            except Exception as error:  # pylint:disable=W0703
+                _logger.exception("Retry %s failed unexpectedly.", retry.id)
+                retry.write({'state': 'failed', 'last_error': str(error)})
+
+    def _execute(self):
+        """Send request again and reschedule it on failure."""
+        self.ensure_one()
+        request = self.request_id
+        if self.company_id:
+            request = request.with_context(allowed_company_ids=[self.company_id.id])
+        kwargs = json_codec.loads(self.request_kwargs)
+        kwargs['retry_on_error'] = False  # Next attempts are scheduled by this record
+        kwargs.pop('return_type', None)  # Retries scheduled before result keywords were dropped
+        kwargs.pop('stream_key', None)
+        kwargs['attempt'] = self.attempt + 1
+        request.clear()
+        request.send_request(**kwargs)
+        vals = {
+            'last_status_code': request.status_code or 0,
+            'last_error': False if request.success else request.message,
+        }
+        attempt = self.attempt + 1
+        retryable = request._is_retryable(kwargs)  # pylint:disable=W0212
+        if request.success:
+            vals['state'] = 'done'
+        elif attempt >= self.max_attempts or not retryable:
+            vals['state'] = 'failed'
+        else:
+            delay = request._get_retry_delay(attempt, self.backoff_factor)  # pylint:disable=W0212
+            vals.update(
+                attempt=attempt,
+                next_attempt_at=fields.Datetime.now() + timedelta(seconds=delay),
+            )
+        _logger.info("Retry of request %s attempt %s: %s", request.name, attempt, vals.get('state'))
+        self.write(vals)
@@ -0,0 +1,11 @@
+"""Import tests."""
+
+from . import test_json_stream
+from . import test_log_filter
+from . import test_request_spec
+
+__all__ = [
+    'test_json_stream',
+    'test_log_filter',
+    'test_request_spec',
+]
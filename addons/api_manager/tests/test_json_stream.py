@@ -0,0 +1,62 @@
+"""Tests of incremental JSON array decoding."""
+
+import json
+
+from odoo.addons.api_manager.utils import json_stream
+from odoo.tests.common import BaseCase
+
+
+def split(data: bytes, size: int):
+    """Return data split into chunks of given size."""
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestJsonStream(BaseCase):
+    """Items decoded from chunks are the same as items decoded from whole document."""
+
+    def test_every_chunk_size(self):
+        document = {
+            'total': 3,
+            'data': [12.5, -1.5e3, 'a, "b"]', {'id': 1, 'name': 'Čaj'}, [1, [2]], True, None, 0],
+        }
+        data = json.dumps(document, ensure_ascii=False).encode()
+        for size in range(1, len(data) + 1):
+            with self.subTest(size=size):
+                items = list(json_stream.iter_array(split(data, size), key='data'))
+                self.assertEqual(items, document['data'])
+
+    def test_number_split_by_chunks(self):
+        self.assertEqual(list(json_stream.iter_array([b'[12.', b'5]'])), [12.5])
+        self.assertEqual(list(json_stream.iter_array([b'[1.5e', b'3]'])), [1500.0])
+        self.assertEqual(list(json_stream.iter_array([b'[1', b'0', b'0]'])), [100])
+        self.assertEqual(list(json_stream.iter_array([b'[-', b'1,tr', b'ue]'])), [-1, True])
+
+    def test_str_chunks(self):
+        self.assertEqual(list(json_stream.iter_array(['[{"a":', ' 1}, 2]'])), [{'a': 1}, 2])
+
+    def test_empty_array(self):
+        self.assertEqual(list(json_stream.iter_array([b' [ ] '])), [])
+        self.assertEqual(list(json_stream.iter_array([b'{"data": []}'], key='data')), [])
+
+    def test_missing_key(self):
+        self.assertEqual(list(json_stream.iter_array([b'{"a": [1], "b": {}}'], key='data')), [])
+        self.assertEqual(list(json_stream.iter_array([b'{}'], key='data')), [])
+
+    def test_invalid_document(self):
+        for data in (b'', b'{"data": [1]}', b'[1 2]', b'[1,', b'[1.]'):
+            with self.subTest(data=data):
+                with self.assertRaises(json.JSONDecodeError):
+                    list(json_stream.iter_array(split(data, 1)))
+
+    def test_items_are_lazy(self):
+        def chunks():
+            yield b'[1, '
+            yield b'2, '
+            raise AssertionError("Read beyond first item")
+
+        items = json_stream.iter_array(chunks())
+        self.assertEqual(next(items), 1)
+
+    def test_chunked(self):
+        self.assertEqual(list(json_stream.chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(json_stream.chunked([], 2)), [])
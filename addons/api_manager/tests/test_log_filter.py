@@ -0,0 +1,70 @@
+"""Tests of log policy filters."""
+
+import hashlib
+from unittest.mock import patch
+
+from odoo.addons.api_manager.utils import log_filter
+from odoo.tests.common import BaseCase
+
+
+class TestLogFilter(BaseCase):
+    """Sampling, truncation and redaction of log entries."""
+
+    def test_should_log(self):
+        self.assertTrue(log_filter.LogFilter().should_log())
+        sampled = log_filter.LogFilter(sample_rate=0.1)
+        with patch.object(log_filter.random, 'random', return_value=0.5):
+            self.assertFalse(sampled.should_log())
+            self.assertTrue(sampled.should_log(failed=True))
+            self.assertFalse(sampled._replace(log_errors=False).should_log(failed=True))
+        with patch.object(log_filter.random, 'random', return_value=0.05):
+            self.assertTrue(sampled.should_log())
+
+    def test_redacted_headers(self):
+        headers = {'Authorization': 'Bearer x', 'Accept': 'application/json'}
+        self.assertEqual(
+            log_filter.LogFilter().filter_headers(headers),
+            {'Authorization': log_filter.REDACTED, 'Accept': 'application/json'},
+        )
+        self.assertEqual(log_filter.LogFilter().filter_headers(None), {})
+
+    def test_header_allowlist(self):
+        policy = log_filter.LogFilter(header_allowlist=log_filter.parse_names('accept'))
+        headers = {'Accept': 'application/json', 'X-Other': '1'}
+        self.assertEqual(policy.filter_headers(headers), {'Accept': 'application/json'})
+
+    def test_cookies(self):
+        data = {'cookies': {'session_id': 'x'}, 'endpoint': '/a'}
+        self.assertEqual(
+            log_filter.LogFilter().apply(data),
+            {'cookies': log_filter.REDACTED, 'endpoint': '/a'},
+        )
+        self.assertEqual(log_filter.LogFilter(log_cookies=True).apply(data), data)
+
+    def test_truncate_body(self):
+        policy = log_filter.LogFilter(max_payload_bytes=4)
+        self.assertEqual(policy.filter_body('abcd'), 'abcd')
+        self.assertEqual(policy.filter_body('abcdef'), 'abcd... [truncated 2 of 6 bytes]')
+        # Multibyte character cut in half is dropped
+        self.assertEqual(policy.filter_body('abcčd'), 'abc... [truncated 2 of 6 bytes]')
+
+    def test_hash_body(self):
+        body = {'a': 1}
+        raw = log_filter._to_bytes(body)
+        self.assertEqual(
+            log_filter.LogFilter(hash_body=True).filter_body(body),
+            {'sha256': hashlib.sha256(raw).hexdigest(), 'size': len(raw)},
+        )
+
+    def test_apply_keeps_input(self):
+        data = {'headers': {'Cookie': 'a'}, 'data': 'abcdef'}
+        result = log_filter.LogFilter(max_payload_bytes=2).apply(data)
+        self.assertEqual(result['headers'], {'Cookie': log_filter.REDACTED})
+        self.assertEqual(data, {'headers': {'Cookie': 'a'}, 'data': 'abcdef'})
+
+    def test_parse_names(self):
+        self.assertEqual(
+            log_filter.parse_names(' Authorization, X-Token ,,'),
+            frozenset({'authorization', 'x-token'}),
+        )
+        self.assertEqual(log_filter.parse_names(None), frozenset())
@@ -0,0 +1,64 @@
+"""Tests of compiled request specs."""
+
+from odoo.addons.api_manager.utils import request_spec
+from odoo.tests.common import BaseCase
+
+
+class TestRequestSpec(BaseCase):
+    """Request definition compiled once and filled in for every request."""
+
+    def setUp(self):
+        super(TestRequestSpec, self).setUp()
+        self.spec = request_spec.compile_spec(
+            'POST',
+            'https://api.example.com/v2/clouds/{cloud_id}/orders/{id}',
+            '{"source": "odoo"}',
+            'application/json',
+            (5.0, 30.0),
+        )
+
+    def test_compile(self):
+        self.assertEqual(self.spec.method, 'post')
+        self.assertEqual(self.spec.url_slots, ('cloud_id', 'id'))
+        self.assertEqual(len(self.spec.url_parts), len(self.spec.url_slots) + 1)
+        self.assertEqual(self.spec.headers, (('Content-Type', 'application/json'),))
+        self.assertEqual(self.spec.data_key, 'json')
+        self.assertEqual(self.spec.timeout, (5.0, 30.0))
+
+    def test_data_key(self):
+        spec = request_spec.compile_spec('GET', 'https://example.com', None, None, (1, 1))
+        self.assertEqual(spec.data_key, 'data')
+        self.assertEqual(spec.headers, ())
+        self.assertIsNone(spec.payload)
+
+    def test_fill_url(self):
+        self.assertEqual(
+            self.spec.fill_url({'{cloud_id}': 7, 'id': 'a'}),
+            'https://api.example.com/v2/clouds/7/orders/a',
+        )
+
+    def test_fill_url_missing_slot(self):
+        self.assertEqual(
+            self.spec.fill_url({'cloud_id': 7}),
+            'https://api.example.com/v2/clouds/7/orders/{id}',
+        )
+
+    def test_merge_payload(self):
+        data = {'source': 'pos', 'total': 10}
+        self.assertEqual(self.spec.merge_payload(data), {'source': 'odoo', 'total': 10})
+        self.assertEqual(data, {'source': 'pos', 'total': 10})
+        self.assertEqual(
+            self.spec.merge_payload([{'a': 1}, {'a': 2}]),
+            [{'a': 1, 'source': 'odoo'}, {'a': 2, 'source': 'odoo'}],
+        )
+
+    def test_merge_without_payload(self):
+        spec = self.spec._replace(payload=None)
+        data = [{'a': 1}]
+        merged = spec.merge_payload(data)
+        self.assertEqual(merged, data)
+        self.assertIsNot(merged, data)
+
+    def test_payload_is_immutable(self):
+        with self.assertRaises(TypeError):
+            self.spec.payload['source'] = 'other'
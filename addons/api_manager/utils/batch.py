@@ -0,0 +1,111 @@
+"""Helpers for concurrent execution of prepared requests."""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Union
+
+import requests
+
+from . import json_codec
+from .exceptions import RateLimitExceeded
+
+_logger = logging.getLogger(__name__)
+
+_SEMAPHORES: Dict[Hashable, threading.BoundedSemaphore] = {}
+_SEMAPHORES_LOCK = threading.Lock()
+
+
+class BatchResult(NamedTuple):
+    """Outcome of single request sent by :func:`execute`."""
+
+    success: bool
+    status_code: Union[int, bool]
+    data: Any
+    response: Optional[requests.Response]
+    error: Optional[str]
+    elapsed: Optional[float] = None
+    timed_out: bool = False
+
+
+def provider_semaphore(key: Hashable, limit: int) -> threading.BoundedSemaphore:
+    """
+    Return process-wide semaphore limiting concurrent requests of provider.
+
+    Semaphore is shared by all batches of the provider in current process, so two batches
+    running at once still respect the provider limit. Changed limit creates a new semaphore.
+
+    :param key: Hashable identifier of provider
+    :param limit: Maximum of requests in flight
+    :return: threading.BoundedSemaphore
+    """
+    limit = max(limit, 1)
+    with _SEMAPHORES_LOCK:
+        semaphore = _SEMAPHORES.get((key, limit))
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(limit)
+            _SEMAPHORES[(key, limit)] = semaphore
+        return semaphore
+
+
+def execute(
+    session: requests.Session,
+    semaphore: threading.BoundedSemaphore,
+    request_data: Dict[str, Any],
+    rate_limiter: Optional[Callable[[], float]] = None,
+) -> BatchResult:
+    """
+    Send prepared request, never raises.
+
+    Called from worker threads, therefore must not touch ORM.
+
+    :param session: HTTP session
+    :param semaphore: Provider concurrency limit
+    :param request_data: Keyword arguments of :func:`requests.Session.request`
+    :param rate_limiter: Callable consuming token of provider rate limit
+    :return: BatchResult
+    """
+    try:
+        return _execute(session, semaphore, request_data, rate_limiter)
+    except Exception as error:  # pylint:disable=W0703
+        # E.g. database error of rate limiter, mustn't abort the rest of the batch
+        _logger.exception("Request to %s failed.", request_data.get('url'))
+        return BatchResult(False, False, None, None, str(error))
+
+
+def _execute(
+    session: requests.Session,
+    semaphore: threading.BoundedSemaphore,
+    request_data: Dict[str, Any],
+    rate_limiter: Optional[Callable[[], float]] = None,
+) -> BatchResult:
+    with semaphore:
+        try:
+            if rate_limiter:
+                rate_limiter()
+        except RateLimitExceeded as error:
+            return BatchResult(False, False, None, None, error.name)
+        start = time.monotonic()
+        try:
+            response = session.request(**json_codec.encode_body(request_data))
+        except requests.exceptions.RequestException as error:
+            response = error.response
+            return BatchResult(
+                False,
+                getattr(response, 'status_code', False),
+                None,
+                response,
+                str(error),
+                time.monotonic() - start,
+                isinstance(error, requests.exceptions.Timeout),
+            )
+        elapsed = time.monotonic() - start
+    success = response.status_code // 200 == 1
+    try:
+        data = json_codec.loads(response.content)
+    except json_codec.DecodeError:
+        _logger.debug("Response is not JSON: %s", {"url": request_data.get('url')})
+        data = {}
+    return BatchResult(
+        success, response.status_code, data, response, None if success else response.text, elapsed
+    )
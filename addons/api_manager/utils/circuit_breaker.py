@@ -0,0 +1,39 @@
+"""Sliding windows of request outcomes used by provider circuit breaker."""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Hashable, Tuple
+
+
+class OutcomeWindows:
+    """Thread-safe windows of last request outcomes of each provider in current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[Hashable, Deque[bool]] = {}
+
+    def record(self, key: Hashable, failed: bool, size: int) -> Tuple[int, float]:
+        """
+        Add outcome to window of key.
+
+        :param key: Hashable identifier of provider
+        :param failed: True if request failed
+        :param size: Number of last outcomes kept in window
+
+        :return: tuple(calls, error_rate) of current window
+        """
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or window.maxlen != size:
+                window = deque(window or (), maxlen=max(size, 1))
+                self._windows[key] = window
+            window.append(failed)
+            return len(window), sum(window) / len(window)
+
+    def reset(self, key: Hashable) -> None:
+        """Forget outcomes of key."""
+        with self._lock:
+            self._windows.pop(key, None)
+
+
+OUTCOME_WINDOWS = OutcomeWindows()
@@ -54,3 +54,32 @@ class InvalidResponse(LoggedError):
         """Initialize error and set error message."""
         message = f"Request {obj_name} didn't return valid response: {response}!"
         super(InvalidResponse, self).__init__(message, **kwargs)
+
+
+class RateLimitExceeded(LoggedError):
+    """Exception raised when request would exceed provider rate limit."""
+
+    def __init__(self, provider_name, retry_after: float, **kwargs):
+        """Initialize error and set error message."""
+        message = f"Rate limit of provider {provider_name} exceeded, retry in {retry_after:.2f}s!"
+        self.retry_after = retry_after
+        super(RateLimitExceeded, self).__init__(message, **kwargs)
+
+
+class CircuitOpen(LoggedError):
+    """Exception raised when provider circuit breaker doesn't allow requests."""
+
+    def __init__(self, provider_name, retry_after: float, **kwargs):
+        """Initialize error and set error message."""
+        message = f"Circuit of provider {provider_name} is open, retry in {retry_after:.0f}s!"
+        self.retry_after = retry_after
+        super(CircuitOpen, self).__init__(message, **kwargs)
+
+
+class DeadlineExceeded(LoggedError):
+    """Exception raised when request cannot be sent within caller's deadline."""
+
+    def __init__(self, obj_name, **kwargs):
+        """Initialize error and set error message."""
+        message = f"Deadline of request {obj_name} exceeded!"
+        super(DeadlineExceeded, self).__init__(message, **kwargs)
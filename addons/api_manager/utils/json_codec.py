@@ -0,0 +1,83 @@
+"""JSON encoding and decoding with the fastest available backend."""
+
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - optional dependency
+    ujson = None
+
+BACKEND = 'orjson' if orjson else 'ujson' if ujson else 'json'
+
+# Errors raised by all backends for invalid documents
+DecodeError = ValueError
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    Decode JSON document, bytes are parsed directly without decoding to str first.
+
+    :param data: UTF-8 encoded bytes or str
+    :raises DecodeError: If data aren't valid JSON
+    :return: Decoded value
+    """
+    if orjson:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    if ujson:
+        return ujson.loads(data)
+    return json.loads(data)
+
+
+def dumps(data: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Encode value into compact UTF-8 JSON.
+
+    Values the fast backend refuses (e.g. integers over 64 bits) are encoded by stdlib json.
+
+    :param data: Value to encode
+    :param default: Called for values which aren't JSON serializable
+    :raises TypeError: If value isn't serializable
+    :return: bytes
+    """
+    if orjson:
+        try:
+            return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    elif ujson and default is None:
+        try:
+            return ujson.dumps(data, ensure_ascii=False, escape_forward_slashes=False).encode()
+        except (TypeError, OverflowError):
+            pass
+    return json.dumps(data, default=default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def dumps_str(data: Any, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Encode value into compact JSON str, e.g. for Text fields."""
+    return dumps(data, default).decode()
+
+
+def encode_body(request_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return copy of :func:`requests.request` keywords with 'json' body encoded by this module.
+
+    Content type of JSON body is expected in headers already, see RequestSpec.headers.
+
+    :param request_data: Keywords of :func:`requests.Session.request`
+    :return: New dictionary
+    """
+    if 'json' not in request_data:
+        return request_data
+    request_data = dict(request_data)
+    body = request_data.pop('json')
+    if body is not None and not request_data.get('data'):
+        request_data['data'] = dumps(body)
+    return request_data
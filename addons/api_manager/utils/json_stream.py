@@ -0,0 +1,133 @@
+"""Incremental decoding of large JSON arrays."""
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, List, Optional, Union
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+# Characters which may follow a complete value
+DELIMITERS = WHITESPACE + ',:]}'
+
+
+class _Reader:
+    """Text buffer filled on demand from iterable of chunks."""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]], encoding: str):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read next chunk into buffer, return False when there is no more data."""
+        if self.eof:
+            return False
+        if self.pos > CHUNK_SIZE:  # Drop consumed data so buffer doesn't grow with the body
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self._decoder.decode(b'', final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Skip whitespace and return next character, empty string at the end of data."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume next character which must be one of chars."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """
+        Decode next JSON value.
+
+        Value is accepted only when followed by a delimiter or at the end of data, so number
+        split between two chunks (e.g. '12.' and '5') isn't decoded partially.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            if (end < len(self.buffer) and self.buffer[end] in DELIMITERS) or not self._fill():
+                self.pos = end
+                return value
+
+
+def iter_array(
+    chunks: Iterable[Union[bytes, str]], key: Optional[str] = None, encoding: str = 'utf-8'
+) -> Iterator[Any]:
+    """
+    Yield items of JSON array one by one without loading whole document.
+
+    :param chunks: Iterable of bytes or str, for example `requests.Response.iter_content`
+    :param key: Key of the array in top level JSON object, document must be array if not set
+    :param encoding: Encoding of bytes chunks
+
+    :raises json.JSONDecodeError: If data are not valid JSON or array wasn't found
+    :return: Iterator of decoded items
+    """
+    reader = _Reader(chunks, encoding)
+    if key is not None and not _seek_key(reader, key):
+        return
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(',]') == ']':
+            return
+
+
+def _seek_key(reader: _Reader, key: str) -> bool:
+    """Move reader behind 'key:' of top level object, return False when key doesn't exist."""
+    reader.expect('{')
+    if reader.peek() == '}':
+        return False
+    while True:
+        member = reader.value()
+        reader.expect(':')
+        if member == key:
+            return True
+        reader.value()  # Skip value of other member
+        if reader.expect(',}') == '}':
+            return False
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Yield lists of at most size items, so streamed items can be processed in batches.
+
+    :param items: Any iterable, e.g. result of :func:`iter_array`
+    :param size: Maximum length of yielded lists
+    :return: Iterator of lists
+    """
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,119 @@
+"""Bounded in-process buffer of log entries written in bulk by background thread."""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+_logger = logging.getLogger(__name__)
+
+Writer = Callable[[str, List[Sequence[Any]]], None]
+
+POLICY_DROP = 'drop'
+POLICY_BLOCK = 'block'
+
+
+class LogBuffer:
+    """
+    Queue of log rows drained by single daemon thread.
+
+    Callers only put rows into the queue, the thread collects them into batches and passes
+    them per database to writer, so logging doesn't cost a database round trip of the caller.
+    When the queue is full, rows are either dropped or caller waits for free space up to
+    ``block_timeout`` seconds, depending on policy.
+    """
+
+    def __init__(  # pylint:disable=too-many-arguments
+        self,
+        writer: Writer,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        policy: str = POLICY_DROP,
+        block_timeout: float = 5.0,
+    ):
+        self._writer = writer
+        self._queue: queue.Queue = queue.Queue(maxsize=max_size)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._policy = policy
+        self._block_timeout = block_timeout
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = threading.Event()
+        self.dropped = 0
+
+    def put(self, dbname: str, row: Sequence[Any]) -> bool:
+        """
+        Enqueue row for writing.
+
+        :param dbname: Database name
+        :param row: Column values in order expected by writer
+        :return: False if row was dropped
+        """
+        self._ensure_thread()
+        try:
+            if self._policy == POLICY_BLOCK:
+                self._queue.put((dbname, row), timeout=self._block_timeout)
+            else:
+                self._queue.put_nowait((dbname, row))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or not dropped % 1000:
+                _logger.warning("Log buffer is full, %s entries dropped so far.", dropped)
+            return False
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write remaining rows and stop the thread."""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _ensure_thread(self) -> None:
+        """Start writer thread on first use, so forked workers start their own one."""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name='api_manager.log_buffer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            rows = self._take()
+            if rows:
+                self._write(rows)
+
+    def _take(self) -> List[Tuple[str, Sequence[Any]]]:
+        """Wait for first row at most flush interval, then take whatever else is ready."""
+        try:
+            rows = [self._queue.get(timeout=self._flush_interval)]
+        except queue.Empty:
+            return []
+        while len(rows) < self._batch_size:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def _write(self, rows: List[Tuple[str, Sequence[Any]]]) -> None:
+        by_database: Dict[str, List[Sequence[Any]]] = {}
+        for dbname, row in rows:
+            by_database.setdefault(dbname, []).append(row)
+        for dbname, database_rows in by_database.items():
+            try:
+                self._writer(dbname, database_rows)
+            except Exception:  # pylint:disable=W0703
+                _logger.exception(
+                    "Writing of %s log entries to database %s failed.", len(database_rows), dbname
+                )
+
@@ -0,0 +1,67 @@
+"""Compressed JSON encoding of API log payloads."""
+
+import zlib
+from typing import Any, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+from . import json_codec
+
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+CODECS = [
+    (CODEC_ZLIB, "zlib"),
+    (CODEC_ZSTD, "Zstandard"),
+]
+DEFAULT_CODEC = CODEC_ZSTD if zstandard else CODEC_ZLIB
+
+
+def _default(value: Any) -> Any:
+    """Convert values which json doesn't know, e.g. request headers or raw body."""
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    if hasattr(value, 'items'):
+        return dict(value.items())
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def dumps(data: Any) -> bytes:
+    """Serialize log data into compact JSON."""
+    return json_codec.dumps(data, default=_default)
+
+
+def compress(raw: bytes, codec: str = DEFAULT_CODEC) -> Tuple[bytes, str]:
+    """
+    Compress serialized payload.
+
+    Falls back to zlib when zstandard isn't installed.
+
+    :param raw: Serialized payload
+    :param codec: Preferred codec
+    :return: tuple(compressed bytes, used codec)
+    """
+    if codec == CODEC_ZSTD and zstandard:
+        return zstandard.ZstdCompressor(level=3).compress(raw), CODEC_ZSTD
+    return zlib.compress(raw, 6), CODEC_ZLIB
+
+
+def decompress(blob: bytes, codec: str) -> bytes:
+    """
+    Decompress stored payload.
+
+    :param blob: Compressed payload
+    :param codec: Codec used by :func:`compress`
+
+    :raises ValueError: If codec isn't available
+    :return: Serialized payload
+    """
+    if codec == CODEC_ZSTD:
+        if not zstandard:
+            raise ValueError("Payload is compressed by zstandard which isn't installed.")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
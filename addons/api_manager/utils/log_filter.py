@@ -0,0 +1,88 @@
+"""Sampling, truncation and redaction of API log entries."""
+
+import hashlib
+import random
+from typing import Any, Dict, FrozenSet, Mapping, NamedTuple, Optional
+
+from . import json_codec
+
+REDACTED = "***"
+
+
+class LogFilter(NamedTuple):
+    """Compiled api_manager.log_policy of single origin."""
+
+    sample_rate: float = 1.0
+    log_errors: bool = True
+    max_payload_bytes: int = 0
+    hash_body: bool = False
+    header_allowlist: FrozenSet[str] = frozenset()
+    redacted_headers: FrozenSet[str] = frozenset({'authorization', 'cookie', 'set-cookie'})
+    log_cookies: bool = False
+
+    def should_log(self, failed: bool = False) -> bool:
+        """
+        Decide if entry is logged, before any of its data are serialized.
+
+        :param failed: True if logged exchange failed
+        :return: bool
+        """
+        if failed and self.log_errors:
+            return True
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def apply(self, data: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Return copy of log data with policy applied.
+
+        Keys 'headers', 'cookies' and 'data' (body) are filtered, other keys are kept as they are.
+
+        :param data: Log data
+        :return: New dictionary
+        """
+        result = dict(data)
+        if 'headers' in result:
+            result['headers'] = self.filter_headers(result['headers'])
+        if 'cookies' in result and not self.log_cookies:
+            result['cookies'] = REDACTED if result['cookies'] else result['cookies']
+        if 'data' in result:
+            result['data'] = self.filter_body(result['data'])
+        return result
+
+    def filter_headers(self, headers: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+        """Keep only allowed headers and mask values of redacted ones."""
+        result = {}
+        for name, value in (headers or {}).items():
+            lower_name = name.lower()
+            if self.header_allowlist and lower_name not in self.header_allowlist:
+                continue
+            result[name] = REDACTED if lower_name in self.redacted_headers else value
+        return result
+
+    def filter_body(self, body: Any) -> Any:
+        """Replace body by its hash or truncate it to maximum size."""
+        if not body or not (self.hash_body or self.max_payload_bytes):
+            return body
+        raw = _to_bytes(body)
+        if self.hash_body:
+            return {'sha256': hashlib.sha256(raw).hexdigest(), 'size': len(raw)}
+        if len(raw) <= self.max_payload_bytes:
+            return body
+        truncated = raw[: self.max_payload_bytes].decode('utf-8', errors='ignore')
+        return f"{truncated}... [truncated {len(raw) - self.max_payload_bytes} of {len(raw)} bytes]"
+
+
+def _to_bytes(body: Any) -> bytes:
+    if isinstance(body, bytes):
+        return body
+    if isinstance(body, str):
+        return body.encode()
+    return json_codec.dumps(body, default=str)
+
+
+def parse_names(value: Optional[str]) -> FrozenSet[str]:
+    """Parse comma separated header names into lower case set."""
+    return frozenset(name.strip().lower() for name in (value or "").split(',') if name.strip())
+
+
+DEFAULT_FILTER = LogFilter()
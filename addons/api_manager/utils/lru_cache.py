@@ -0,0 +1,47 @@
+"""Bounded in-process LRU set with expiring entries."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+
+class ExpiringLRU:
+    """
+    Set of recently seen keys, thread safe.
+
+    Holds at most ``max_size`` keys, the least recently added are evicted first. Keys older
+    than ``ttl`` seconds are treated as missing.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0):
+        self._max_size = max_size
+        self._ttl = ttl
+        self._keys: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            added_at = self._keys.get(key)
+            if added_at is None:
+                return False
+            if time.monotonic() - added_at > self._ttl:
+                del self._keys[key]
+                return False
+            return True
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: Hashable) -> None:
+        """Add key or refresh its age."""
+        with self._lock:
+            self._keys[key] = time.monotonic()
+            self._keys.move_to_end(key)
+            while len(self._keys) > self._max_size:
+                self._keys.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget all keys."""
+        with self._lock:
+            self._keys.clear()
@@ -0,0 +1,170 @@
+"""In-memory aggregation of request metrics."""
+
+import threading
+import time
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+import requests
+
+# Upper bounds of latency histogram buckets in seconds, slower requests fall only into +Inf
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class MetricsKey(NamedTuple):
+    """Identifier of aggregated series."""
+
+    dbname: str
+    provider_id: int
+    request_id: int
+    status_class: str
+
+
+class Series:  # pylint:disable=too-few-public-methods
+    """Counters of single series since last flush."""
+
+    __slots__ = (
+        'count',
+        'timeouts',
+        'retries',
+        'bytes_sent',
+        'bytes_received',
+        'latency_count',
+        'latency_sum',
+        'buckets',
+    )
+
+    def __init__(self):
+        self.count = 0
+        self.timeouts = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency_count = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+
+class MetricsAggregator:
+    """
+    Thread-safe accumulator of request metrics in current process.
+
+    Observations only increment counters in memory, database is touched once per flush
+    interval by the owner of the data, see api_manager.metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[MetricsKey, Series] = {}
+        self._last_flush: Dict[Hashable, float] = {}
+
+    def observe(  # pylint:disable=too-many-arguments
+        self,
+        key: MetricsKey,
+        elapsed: Optional[float],
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+        timed_out: bool = False,
+        retry: bool = False,
+    ) -> None:
+        """
+        Record outcome of single request.
+
+        :param key: Series of the request
+        :param elapsed: Duration of request in seconds or None if request wasn't sent
+        :param bytes_sent: Size of request body
+        :param bytes_received: Size of response body
+        :param timed_out: True if request timed out or missed its deadline
+        :param retry: True if request was a retry of failed request
+        """
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = Series()
+            series.count += 1
+            series.timeouts += timed_out
+            series.retries += retry
+            series.bytes_sent += bytes_sent
+            series.bytes_received += bytes_received
+            if elapsed is None:
+                return
+            series.latency_count += 1
+            series.latency_sum += elapsed
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    series.buckets[index] += 1
+                    break
+
+    def is_due(self, dbname: str, interval: float) -> bool:
+        """Check if data of database weren't flushed for longer than interval in seconds."""
+        now = time.monotonic()
+        with self._lock:
+            last_flush = self._last_flush.setdefault(dbname, now)
+            return now - last_flush >= interval
+
+    def drain(self, dbname: str) -> List[Tuple[MetricsKey, Series]]:
+        """
+        Remove and return series of database.
+
+        :param dbname: Database name
+        :return: List of (key, series) tuples
+        """
+        with self._lock:
+            self._last_flush[dbname] = time.monotonic()
+            keys = [key for key in self._series if key.dbname == dbname]
+            return [(key, self._series.pop(key)) for key in keys]
+
+    def restore(self, drained: List[Tuple[MetricsKey, Series]]) -> None:
+        """Put drained series back when flush failed, so data are sent with next flush."""
+        with self._lock:
+            for key, series in drained:
+                current = self._series.get(key)
+                if current is None:
+                    self._series[key] = series
+                    continue
+                for name in Series.__slots__:
+                    if name != 'buckets':
+                        setattr(current, name, getattr(current, name) + getattr(series, name))
+                current.buckets = [a + b for a, b in zip(current.buckets, series.buckets)]
+
+
+def status_class(status_code: Union[int, bool, None], sent: bool = True) -> str:
+    """
+    Return class of status code used as metrics label.
+
+    :param status_code: Response status code or False if there is no response
+    :param sent: False if request was rejected before sending
+    :return: '2xx' to '5xx', 'error' without response or 'rejected'
+    """
+    if not sent:
+        return 'rejected'
+    if not status_code:
+        return 'error'
+    return f"{min(max(status_code // 100, 1), 5)}xx"
+
+
+def transferred_bytes(response: Optional[requests.Response]) -> Tuple[int, int]:
+    """
+    Return size of request and response body.
+
+    Body of streamed response isn't read, 'Content-Length' header is used instead.
+
+    :param response: Response or None
+    :return: tuple(bytes_sent, bytes_received)
+    """
+    if response is None:
+        return 0, 0
+    body = response.request.body if response.request is not None else None
+    if isinstance(body, str):
+        body = body.encode()
+    sent = len(body) if isinstance(body, bytes) else 0
+    if response._content_consumed:  # pylint:disable=W0212
+        received = len(response.content or b'')
+    else:
+        try:
+            received = int(response.headers.get('Content-Length', 0))
+        except ValueError:
+            received = 0
+    return sent, received
+
+
+METRICS = MetricsAggregator()
@@ -0,0 +1,87 @@
+"""Token bucket rate limiter shared by all workers through database."""
+
+import logging
+import time
+from typing import NamedTuple
+
+from .exceptions import RateLimitExceeded
+
+_logger = logging.getLogger(__name__)
+
+_NOW = "(clock_timestamp() AT TIME ZONE 'UTC')"
+
+# Tokens are refilled from elapsed time and consumed under row lock in one statement. Token is
+# consumed even when the bucket is empty as long as the caller is allowed to wait for it,
+# negative balance then queues callers of all workers one after another.
+_CONSUME_QUERY = f"""
+    WITH bucket AS (
+        SELECT id, LEAST(
+            %(burst)s,
+            tokens + GREATEST(EXTRACT(EPOCH FROM {_NOW} - updated_at), 0) * %(rate)s
+        ) AS available
+        FROM api_manager_rate_limit
+        WHERE provider_id = %(provider_id)s
+        FOR UPDATE
+    )
+    UPDATE api_manager_rate_limit rate_limit
+    SET tokens = bucket.available - (
+            CASE WHEN bucket.available - 1 >= -%(max_debt)s THEN 1 ELSE 0 END
+        ),
+        updated_at = {_NOW}
+    FROM bucket
+    WHERE rate_limit.id = bucket.id
+    RETURNING bucket.available
+"""
+
+_INSERT_QUERY = f"""
+    INSERT INTO api_manager_rate_limit (provider_id, tokens, updated_at)
+    VALUES (%(provider_id)s, %(burst)s, {_NOW})
+    ON CONFLICT (provider_id) DO NOTHING
+"""
+
+
+class RateLimit(NamedTuple):
+    """Rate limit configuration of provider."""
+
+    name: str
+    rate: float
+    burst: int
+    max_wait: float
+
+
+def acquire(registry, provider_id: int, limit: RateLimit) -> float:
+    """
+    Consume one token of provider bucket, wait until it is available if allowed.
+
+    Bucket state is updated in its own transaction, so lock is held only for one statement
+    and callers in all workers share the same bucket. Doesn't use ORM, may be called from
+    any thread.
+
+    :param registry: odoo.modules.registry.Registry of the database
+    :param provider_id: ID of api_manager.provider
+    :param limit: Rate limit configuration
+
+    :raises RateLimitExceeded: When token wouldn't be available within maximal wait
+    :return: Seconds waited for the token
+    """
+    params = {
+        'provider_id': provider_id,
+        'rate': limit.rate,
+        'burst': max(limit.burst, 1),
+        'max_debt': limit.max_wait * limit.rate,
+    }
+    with registry.cursor() as cr:
+        cr.execute(_CONSUME_QUERY, params)
+        row = cr.fetchone()
+        if row is None:
+            cr.execute(_INSERT_QUERY, params)
+            cr.execute(_CONSUME_QUERY, params)
+            row = cr.fetchone()
+    available = row[0]
+    wait = max(1 - available, 0) / limit.rate
+    if available - 1 < -params['max_debt']:
+        raise RateLimitExceeded(limit.name, wait)
+    if wait:
+        _logger.debug("Waiting %.3fs for rate limit of provider %s.", wait, limit.name)
+        time.sleep(wait)
+    return wait
@@ -0,0 +1,87 @@
+"""Compiled, immutable description of api_manager.request record."""
+
+import re
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from . import json_codec
+
+SLOT_PATTERN = re.compile(r'{([^}]*)}')
+
+
+class RequestSpec(NamedTuple):
+    """
+    Request record compiled into a template which is only filled in when sending.
+
+    URL is split into literal parts and named slots, ``url_parts`` always contains one more
+    item than ``url_slots`` and slot values are placed between the parts.
+    """
+
+    method: str
+    url_parts: Tuple[str, ...]
+    url_slots: Tuple[str, ...]
+    payload: Optional[Mapping[str, Any]]
+    headers: Tuple[Tuple[str, str], ...]
+    data_key: str
+    timeout: Tuple[float, float]
+
+    def fill_url(self, params: Dict[str, Any]) -> str:
+        """
+        Return URL with slots replaced by parameter values.
+
+        Parameters may be keyed either by slot name ``cloud_id`` or by placeholder
+        ``{cloud_id}``. Values are inserted verbatim, slots without value are kept unchanged.
+
+        :param params: Slot values
+        :return: URL
+        """
+        params = {key.strip('{}'): value for key, value in params.items()}
+        url = [self.url_parts[0]]
+        for slot, part in zip(self.url_slots, self.url_parts[1:]):
+            url.append(str(params[slot]) if slot in params else f"{{{slot}}}")
+            url.append(part)
+        return ''.join(url)
+
+    def merge_payload(self, data: Union[Dict, List]) -> Union[Dict, List]:
+        """
+        Return request body with payload override applied.
+
+        :param data: Data from caller, single object or list of objects
+        :return: New object or list of new objects
+        """
+        if not self.payload:
+            return list(data) if isinstance(data, list) else dict(data)
+        if isinstance(data, list):
+            return [{**item, **self.payload} for item in data]
+        return {**data, **self.payload}
+
+
+def compile_spec(
+    method: str,
+    url: str,
+    payload: Optional[str],
+    content_type: Optional[str],
+    timeout: Tuple[float, float],
+) -> RequestSpec:
+    """
+    Compile request definition.
+
+    :param method: HTTP method
+    :param url: Full URL with ``{name}`` slots
+    :param payload: JSON payload override
+    :param content_type: Content type of the request body
+    :param timeout: Connect and read timeout in seconds
+
+    :return: RequestSpec
+    """
+    tokens = SLOT_PATTERN.split(url)
+    headers = (('Content-Type', content_type),) if content_type else ()
+    return RequestSpec(
+        method=method.lower(),
+        url_parts=tuple(tokens[::2]),
+        url_slots=tuple(tokens[1::2]),
+        payload=MappingProxyType(json_codec.loads(payload)) if payload else None,
+        headers=headers,
+        data_key='json' if content_type == 'application/json' else 'data',
+        timeout=timeout,
+    )
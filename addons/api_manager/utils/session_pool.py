@@ -0,0 +1,150 @@
+"""Per-process pool of persistent HTTP sessions."""
+
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Hashable, Iterator, NamedTuple
+
+import requests
+
+_logger = logging.getLogger(__name__)
+
+
+class SessionConfig(NamedTuple):
+    """Connection settings of pooled session, taken from api_manager.provider."""
+
+    scheme: str
+    pool_connections: int
+    pool_maxsize: int
+    idle_timeout: int
+    max_retries: int
+
+
+class _PooledSession:  # pylint:disable=too-few-public-methods
+    """Session with its configuration, time of last use and number of active leases."""
+
+    __slots__ = ('session', 'config', 'last_used', 'leases', 'retired')
+
+    def __init__(self, session: requests.Session, config: SessionConfig):
+        self.session = session
+        self.config = config
+        self.last_used = time.monotonic()
+        self.leases = 0
+        self.retired = False  # Removed from pool, closed when the last lease ends
+
+
+class SessionPool:
+    """
+    Thread-safe registry of keep-alive sessions.
+
+    Sessions are keyed by caller (for example database name and provider id) and reused for
+    every request, so TCP and TLS handshakes are paid only once per connection. Sessions which
+    were not used for longer than their idle timeout are closed on next access to the pool,
+    sessions in use are closed only after their last lease ends.
+
+    Pooled sessions are shared by all callers of the key (e.g. all companies), so they never
+    store cookies, cookies must be passed with each request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[Hashable, _PooledSession] = {}
+
+    @staticmethod
+    def build_session(config: SessionConfig) -> requests.Session:
+        """
+        Create new session with mounted HTTP adapter.
+
+        :param config: Session configuration
+        :return: requests.Session
+        """
+        session = requests.Session()
+        # This doesn't retry on status codes, only if request doesn't reach the server!
+        retry = requests.adapters.Retry(
+            total=config.max_retries,
+            read=config.max_retries,
+            connect=config.max_retries,
+            backoff_factor=0.1,
+        )
+        http_adapter = requests.adapters.HTTPAdapter(
+            pool_connections=config.pool_connections,
+            pool_maxsize=config.pool_maxsize,
+            max_retries=retry,
+        )
+        session.mount(f"{config.scheme}://", http_adapter)
+        return session
+
+    @contextmanager
+    def lease(self, key: Hashable, config: SessionConfig) -> Iterator[requests.Session]:
+        """
+        Yield pooled session for key, create new one when missing or configuration changed.
+
+        Session isn't closed by eviction or :func:`discard` while it is leased.
+
+        :param key: Hashable identifier of session owner
+        :param config: Expected session configuration
+        :return: requests.Session
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            pooled = self._sessions.get(key)
+            if pooled is not None and pooled.config != config:
+                _logger.debug("Configuration of session %s changed, recreating.", key)
+                self._retire(self._sessions.pop(key))
+                pooled = None
+            if pooled is None:
+                session = self.build_session(config)
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                pooled = _PooledSession(session, config)
+                self._sessions[key] = pooled
+            pooled.leases += 1
+        try:
+            yield pooled.session
+        finally:
+            with self._lock:
+                pooled.leases -= 1
+                pooled.last_used = time.monotonic()
+                if pooled.retired:
+                    self._retire(pooled)
+
+    def discard(self, key: Hashable) -> None:
+        """Remove session for key, it is closed once not in use."""
+        with self._lock:
+            pooled = self._sessions.pop(key, None)
+            if pooled is not None:
+                self._retire(pooled)
+
+    def close_all(self) -> None:
+        """Close and remove all sessions."""
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for pooled in sessions.values():
+            pooled.session.close()
+
+    def _evict_idle(self, now: float) -> None:
+        """Close unused sessions idle for longer than their timeout. Caller must hold the lock."""
+        expired = [
+            key
+            for key, pooled in self._sessions.items()
+            if not pooled.leases
+            and pooled.config.idle_timeout
+            and now - pooled.last_used > pooled.config.idle_timeout
+        ]
+        for key in expired:
+            _logger.debug("Closing idle session %s.", key)
+            self._retire(self._sessions.pop(key))
+
+    @staticmethod
+    def _retire(pooled: _PooledSession) -> None:
+        """Close session removed from pool, or mark it to be closed. Caller must hold the lock."""
+        pooled.retired = True
+        if not pooled.leases:
+            pooled.session.close()
+
+
+SESSION_POOL = SessionPool()
+atexit.register(SESSION_POOL.close_all)
@@ -24,6 +24,7 @@
         # Data
         'data/providers.xml',
         'data/requests.xml',
+        'data/cron.xml',
         # Security
         'security/ir.model.access.csv',
         # Views
@@ -33,6 +34,8 @@
         'views/pos_payment_method_views.xml',
         'views/dotykacka_order.xml',
         'views/dotykacka_queue.xml',
+        'views/dotykacka_inbox.xml',
+        'views/dotykacka_sync_watermark.xml',
         'views/actions.xml',
         'views/menu_items.xml',
     ],
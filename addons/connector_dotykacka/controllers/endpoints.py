@@ -1,12 +1,30 @@
 """Module for Dotykacka endpoints."""
 
+import logging
+
 from odoo import http, SUPERUSER_ID
+from odoo.addons.api_manager.utils import json_stream
+
+from ..patch.http import StreamedArray
+
+_logger = logging.getLogger(__name__)
 
 DEFAULT_ERROR_VALUE = -1
+STREAM_CHUNK_SIZE = 200
+
+
+class DuplicateWebhook(Exception):
+    """Streamed webhook was already received."""
 
 
 class DotykackaEndpoint(http.Controller):
-    """Endpoints for requests from Dotykacka."""
+    """
+    Endpoints for requests from Dotykacka.
+
+    Incoming data are only stored in dotykacka.inbox and processed by cron, so response
+    time doesn't depend on processing. Redelivered webhooks are acknowledged without
+    being logged or stored again.
+    """
 
     @http.route(
         '/rest/v1/dotykacka/order/map',
@@ -17,9 +35,12 @@ class DotykackaEndpoint(http.Controller):
     )
     def create_dotykacka_order(self):
         """Endpoint for mapping dotykacka data to existing dotykacka orders."""
+        digest = self._register_webhook('rest/v1/dotykacka/order/map')
+        if not digest:
+            return True
         parser = self._prepare_parser('rest/v1/dotykacka/order/map')
         order_data = parser.data.get('order', None)
-        parser.order_map(order_data)
+        parser.env['dotykacka.inbox'].enqueue('order_map', [order_data])
         parser.clear()
         return True
 
@@ -32,13 +53,50 @@ class DotykackaEndpoint(http.Controller):
     )
     def update_dotykacka_order(self):
         """Endpoint for updating dotykacka order with new information."""
+        items = http.request.jsonrequest.get('items', [])
+        if isinstance(items, StreamedArray):
+            return self._update_streamed('rest/v1/dotykacka/order/update', items)
+        digest = self._register_webhook('rest/v1/dotykacka/order/update')
+        if not digest:
+            return True
         parser = self._prepare_parser('rest/v1/dotykacka/order/update')
-        for order in parser.data.get('items', []):
-            parser.order_update(order)
-            parser.env.cr.commit()  # pylint:disable=E8102
+        parser.env['dotykacka.inbox'].enqueue('order_update', parser.data.get('items', []))
         parser.clear()
         return True
 
+    def _update_streamed(self, endpoint_path: str, items: StreamedArray):
+        """
+        Store items of streamed array body in chunks, memory doesn't grow with body size.
+
+        Duplicate is recognized only once the whole body was read, its items are rolled back.
+        """
+        parser = self._prepare_parser(endpoint_path)
+        inbox = parser.env['dotykacka.inbox']
+        try:
+            with parser.env.cr.savepoint():
+                for chunk in json_stream.chunked(items, STREAM_CHUNK_SIZE):
+                    inbox.enqueue('order_update', chunk)
+                    inbox.invalidate_cache()
+                digest = self._register_webhook(endpoint_path, items.hexdigest())
+                if not digest:
+                    raise DuplicateWebhook()
+        except DuplicateWebhook:
+            return True
+        finally:
+            parser.clear()
+        return True
+
+    @staticmethod
+    def _register_webhook(endpoint_path: str, body_hash: str = None):
+        """Return digest of webhook or False if it was already received."""
+        digests = http.request.env['dotykacka.webhook_digest'].sudo()
+        if body_hash is None:
+            body_hash = digests.hash_body(http.request.httprequest.get_data())
+        digest = digests.register(endpoint_path, body_hash)
+        if not digest:
+            _logger.debug("Duplicate webhook %s acknowledged.", endpoint_path)
+        return digest
+
     @staticmethod
     def _prepare_parser(endpoint_path: str):
         parser = http.request.env['dotykacka.parser'].with_user(SUPERUSER_ID).sudo()
@@ -1,10 +1,13 @@
 """Import models."""
 from . import api_request
 from . import dotykacka_base
+from . import dotykacka_inbox
 from . import dotykacka_order
 from . import dotykacka_parser
 from . import dotykacka_product_catalog
 from . import dotykacka_queue
+from . import dotykacka_sync_watermark
+from . import dotykacka_webhook_digest
 from . import pos_config
 from . import pos_order
 from . import pos_payment_method
@@ -19,6 +22,9 @@ __all__ = [
     "pos_payment_method",
     'dotykacka_parser',
     'dotykacka_queue',
+    'dotykacka_inbox',
+    'dotykacka_webhook_digest',
+    'dotykacka_sync_watermark',
     'dotykacka_order',
     "pos_order",
 ]
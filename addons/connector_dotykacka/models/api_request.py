@@ -2,6 +2,7 @@
 __version__ = "1.0"
 
 import logging
+import time
 
 from odoo import models
 
@@ -20,13 +21,48 @@ class APIRequest(models.Model):  # pylint:disable=too-few-public-methods
         if attempt > max_tries:
             return {}
         data = self.send_request(**kwargs)
-        if isinstance(data, dict) and {'error', 'reason'} <= data.keys():
-            if (
-                data['error'] == 'Forbidden'
-                and data['reason'] == 'ACCESS_TOKEN_EXPIRED'
-                or data['reason'] == 'INVALID_ACCESS_TOKEN'
-            ):
-                self.env['dotykacka.base']._renew_token()  # pylint:disable=W0212
-                self.clear()
-                data = self.send_request_dotykacka(**dict(kwargs, retry=attempt + 1))
+        deadline = kwargs.get('deadline')
+        if deadline is not None and deadline <= time.monotonic():
+            return data
+        checked = data
+        if data is False and kwargs.get('return_type') == 'stream':
+            # Failed streamed response returns False, its error body was read already
+            checked = self.decode_response()
+        if self._is_token_expired(checked):
+            self.env['dotykacka.base']._renew_token()  # pylint:disable=W0212
+            self.clear()
+            data = self.send_request_dotykacka(**dict(kwargs, retry=attempt + 1))
         return data
+
+    def send_requests_batch_dotykacka(self, calls, max_workers=None):
+        """
+        Send requests concurrently with access token renewal in case of fail.
+
+        Token is renewed at most once per batch, after which only requests rejected
+        due to the expired token are sent again.
+
+        :param calls: List of keyword dictionaries, see :func:`send_requests_batch`
+        :param max_workers: Maximum of requests in flight
+
+        :return: List of results in the same order as calls
+        """
+        results = self.send_requests_batch(calls, max_workers=max_workers)
+        expired = [index for index, res in enumerate(results) if self._is_token_expired(res.data)]
+        if not expired:
+            return results
+        self.env['dotykacka.base']._renew_token()  # pylint:disable=W0212
+        retried = self.send_requests_batch([calls[index] for index in expired], max_workers)
+        for index, result in zip(expired, retried):
+            results[index] = result
+        return results
+
+    @staticmethod
+    def _is_token_expired(data) -> bool:
+        """Check if dotykacka refused request due to invalid or expired access token."""
+        if not (isinstance(data, dict) and {'error', 'reason'} <= data.keys()):
+            return False
+        return (
+            data['error'] == 'Forbidden'
+            and data['reason'] == 'ACCESS_TOKEN_EXPIRED'
+            or data['reason'] == 'INVALID_ACCESS_TOKEN'
+        )
@@ -49,12 +49,23 @@ class DotykackaBase(models.TransientModel):
         result = date_time.astimezone(UTC).replace(tzinfo=None)
         return result
 
-    def ping_pos_hw(self, cloud_id, branch_id):
+    def get_cloud_id(self, provider=None):
+        """
+        Return dotykacka cloud ID of current company.
+
+        :param provider: api_manager.provider record, dotykacka provider when not set
+        :return: str or None when cloud ID isn't configured
+        """
+        provider = provider or self.env.ref('connector_dotykacka.provider_dotykacka')
+        return self.env['api_manager.request_parameter'].get_value(provider, 'cloud_id')
+
+    def ping_pos_hw(self, cloud_id, branch_id, deadline=None):
         """
         Ping dotykacka HW before sending request.
 
         :param cloud_id: ID of cloud
         :param branch_id: ID of branch
+        :param deadline: Deadline of the ping, see api_manager.request `deadline_after`
         :return: bool
         """
         request_pos = self.env.ref('connector_dotykacka.api_request_dotykacka_pos_actions')
@@ -64,7 +75,10 @@ class DotykackaBase(models.TransientModel):
             params={"{cloud_id}": cloud_id, "{branch_id}": branch_id},
             data=data,
             return_type='decoded',
+            deadline=deadline,
         )
+        if request_pos.timed_out:
+            _logger.warning("Dotykacka HW of branch %s didn't respond in time.", branch_id)
         return bool(response)
 
     def _renew_token(self):
@@ -73,15 +87,8 @@ class DotykackaBase(models.TransientModel):
         provider_name = 'connector_dotykacka.provider_dotykacka'
         request = self.env.ref(request_name)
         provider = self.env.ref(provider_name)
-        cloud_id = self.env['api_manager.request_parameter'].search(
-            [
-                ('provider', '=', provider.id),
-                ('key', '=', 'cloud_id'),
-                ('company_id', '=', self.env.company.id),
-            ]
-        )
         data_payload = {
-            "_cloudId": cloud_id.value,
+            "_cloudId": self.get_cloud_id(provider),
         }
         result = request.send_request(data=data_payload)
         if not result:
@@ -0,0 +1,187 @@
+"""Module for Dotykacka webhook inbox."""
+__version__ = "1.0"
+
+import logging
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.addons.api_manager.utils import json_codec
+
+_logger = logging.getLogger(__name__)
+
+INBOX_KINDS = [
+    ('order_map', 'Order Map'),
+    ('order_update', 'Order Update'),
+]
+
+
+class DotykackaInbox(models.Model):
+    """
+    Incoming webhook item waiting for processing.
+
+    Webhook endpoints only store items and respond, items are processed by cron.
+    Items with the same ordering key (dotykacka order) are processed in order of arrival.
+    """
+
+    _name = 'dotykacka.inbox'
+    _description = "Dotykacka Inbox"
+    _order = 'id desc'
+
+    kind = fields.Selection(INBOX_KINDS, required=True, readonly=True)
+    ordering_key = fields.Char(required=True, readonly=True)
+    payload = fields.Text(required=True, readonly=True)
+    state = fields.Selection(
+        [
+            ('pending', 'Pending'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+        ],
+        default='pending',
+        required=True,
+        index=True,
+    )
+    attempts = fields.Integer(default=0, readonly=True)
+    next_attempt_at = fields.Datetime(default=fields.Datetime.now, readonly=True)
+    processed_at = fields.Datetime(readonly=True)
+    error = fields.Text(readonly=True)
+
+    def init(self):
+        """Create partial index used to find the oldest pending item of every ordering key."""
+        self.env.cr.execute(
+            """
+            CREATE INDEX IF NOT EXISTS dotykacka_inbox_pending_key_index
+            ON dotykacka_inbox (ordering_key, id) WHERE state = 'pending'
+            """
+        )
+
+    @api.model
+    def enqueue(self, kind: str, items) -> int:
+        """
+        Store webhook items for asynchronous processing.
+
+        :param kind: Kind of webhook, see INBOX_KINDS
+        :param items: List of dotykacka orders
+        :return: Number of stored items
+        """
+        vals_list = [
+            {
+                'kind': kind,
+                'ordering_key': self._get_ordering_key(item),
+                'payload': json_codec.dumps_str(item),
+            }
+            for item in items
+            if isinstance(item, dict)
+        ]
+        if vals_list:
+            self.create(vals_list)
+        return len(vals_list)
+
+    @staticmethod
+    def _get_ordering_key(item) -> str:
+        """Return key of dotykacka order, updates of one order mustn't be reordered."""
+        for key in ('external-id', 'externalid', 'id', 'orderid'):
+            if item.get(key):
+                return str(item[key])
+        return ''
+
+    @api.model
+    def _cron_process_pending(self, time_budget=50, limit=200, max_attempts=5):
+        """
+        Process pending items in batches until inbox is drained or time budget runs out.
+
+        Every batch is committed, so its row locks are released and processed items are kept
+        even if a later batch fails. Budget should be shorter than the cron interval.
+
+        :param time_budget: Seconds after which no new batch is started
+        :param limit: Maximum of items in one batch
+        :param max_attempts: Attempts before item is marked as failed
+        """
+        deadline = time.monotonic() + time_budget
+        while time.monotonic() < deadline:
+            processed = self._process_pending(limit, max_attempts)
+            self.env.cr.commit()  # pylint:disable=E8102
+            if processed < limit:
+                return
+
+    @api.model
+    def _process_pending(self, limit=200, max_attempts=5) -> int:
+        """
+        Process pending items, the oldest pending item of every ordering key only.
+
+        Rows are locked with SKIP LOCKED, so several workers may drain the inbox at once
+        without processing two items of the same order concurrently or out of order.
+
+        :param limit: Maximum of items processed in one run
+        :param max_attempts: Attempts before item is marked as failed
+        :return: Number of processed items
+        """
+        self.env.cr.execute(
+            """
+            SELECT id FROM dotykacka_inbox i
+            WHERE state = 'pending' AND next_attempt_at <= %s
+            AND NOT EXISTS (
+                SELECT 1 FROM dotykacka_inbox p
+                WHERE p.state = 'pending' AND p.ordering_key = i.ordering_key AND p.id < i.id
+            )
+            ORDER BY id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+            """,
+            (fields.Datetime.now(), limit),
+        )
+        items = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if not items:
+            return 0
+        count = len(items)
+        parser = self.env['dotykacka.parser'].sudo()
+        updates = items.filtered(lambda item: item.kind == 'order_update')
+        try:
+            with self.env.cr.savepoint():
+                parser.order_update_batch([json_codec.loads(item.payload) for item in updates])
+        except Exception:  # pylint:disable=W0703
+            _logger.exception("Batch of dotykacka updates failed, processing one by one.")
+        else:
+            updates._mark_done()  # pylint:disable=W0212
+            items -= updates
+        for item in items:
+            try:
+                with self.env.cr.savepoint():
+                    item._process(parser)  # pylint:disable=W0212
+            except Exception as error:  # pylint:disable=W0703
+                _logger.exception("Processing of dotykacka inbox item %s failed.", item.id)
+                item._mark_failed(str(error), max_attempts)  # pylint:disable=W0212
+            else:
+                item._mark_done()  # pylint:disable=W0212
+        return count
+
+    def _process(self, parser):
+        """Process single item."""
+        self.ensure_one()
+        data = json_codec.loads(self.payload)
+        if self.kind == 'order_map':
+            parser.order_map(data)
+        else:
+            parser.order_update_batch([data])
+
+    def _mark_done(self):
+        self.write({'state': 'done', 'processed_at': fields.Datetime.now(), 'error': False})
+
+    def _mark_failed(self, error, max_attempts):
+        """Reschedule item with exponential delay or mark it failed after last attempt."""
+        for item in self:
+            attempts = item.attempts + 1
+            vals = {'attempts': attempts, 'error': error}
+            if attempts >= max_attempts:
+                vals['state'] = 'failed'
+            else:
+                vals['next_attempt_at'] = fields.Datetime.now() + timedelta(minutes=2 ** attempts)
+            item.write(vals)
+
+    @api.model
+    def _clear_done(self, days=7):
+        """Delete items processed more than given number of days ago."""
+        self.env.cr.execute(
+            "DELETE FROM dotykacka_inbox WHERE state = 'done' AND processed_at < %s",
+            (fields.Datetime.now() - timedelta(days=days),),
+        )
@@ -41,7 +41,7 @@ class DotykackaOrder(models.Model):
         'res.company', string="Company", readonly=True, required=True, copy=True
     )
     reference = fields.Char(index=True, copy=False)
-    dotykacka_id = fields.Char("Dotykacka ID", copy=False)
+    dotykacka_id = fields.Char("Dotykacka ID", index=True, copy=False)
     order_series_id = fields.Char("Receipt No.", copy=False)
     updated_at = fields.Datetime(readonly=True, tracking=True, copy=False)
     created_at = fields.Datetime(readonly=True, tracking=True, copy=False)
@@ -159,6 +159,7 @@ class DotykackaOrder(models.Model):
                 'filter': f'id%7Ceq%7C{self.dotykacka_id}',  # | is encoded to %7C
             },
             return_type='decoded',
+            correlation_key=self.reference,
         )
         if not data:
             err_msg = f"No data from dotykacka returned!\nOrder: {related_order.name}"
@@ -1,11 +1,10 @@
 """Module for logging Dotykacka PoS orders."""
 __version__ = "1.0"
 
-import json
 import logging
-from datetime import datetime
 
 from odoo import fields, http, models, SUPERUSER_ID
+from odoo.addons.api_manager.utils import json_codec
 
 LOG_ORIGIN = __name__
 DEFAULT_ERROR_VALUE = -1
@@ -56,8 +55,6 @@ class DotykackaParser(models.TransientModel):
             'updated_at': fields.Datetime.now(),
         }
         dotykacka_order.update(data)
-        self._check_queue(dotykacka_order, order)
-
         return True
 
     def order_create(self, order):
@@ -125,6 +122,81 @@ class DotykackaParser(models.TransientModel):
         external_id = order.get('externalid', DEFAULT_ERROR_VALUE)
         return self._queue_order(order, 'order_external_id', external_id)
 
+    def order_update_batch(self, orders) -> int:
+        """
+        Update dotykacka.order records with batch of incoming dotykacka data.
+
+        Same as :func:`order_update` for every item, but all related dotykacka.order records
+        are loaded by one query and updates of the same state are written together.
+        Errors are raised, caller should retry items one by one to find the broken one.
+        Caller commits the batch.
+
+        :param orders: List of dotykacka orders
+        :return: Number of processed items
+        """
+        orders = [order for order in orders if isinstance(order, dict)]
+        ids = {
+            str(order.get(key))
+            for order in orders
+            for key in ('orderid', 'relatedorderid')
+            if order.get(key)
+        }
+        by_dotykacka_id = {
+            record.dotykacka_id: record
+            for record in self.env['dotykacka.order'].search([('dotykacka_id', 'in', list(ids))])
+        }
+        updates = {}  # Latest data of every updated order, later items win
+        queued = []
+        processed = 0
+        for order in orders:
+            order_id = str(order.get('orderid', DEFAULT_ERROR_VALUE))
+            related_order_id = order.get('relatedorderid', DEFAULT_ERROR_VALUE)
+            dotykacka_order = by_dotykacka_id.get(order_id)
+            related_order = by_dotykacka_id.get(str(related_order_id))
+            if dotykacka_order and not (related_order_id and related_order):
+                # Only matching Order exists in odoo
+                updates[dotykacka_order] = order
+            elif related_order and related_order_id and not dotykacka_order:
+                # Related Order exists in odoo but refund wasn't created yet.
+                dotykacka_order = self.order_create(order)
+                if dotykacka_order:
+                    by_dotykacka_id[dotykacka_order.dotykacka_id] = dotykacka_order
+                    updates[dotykacka_order] = order
+            elif dotykacka_order and related_order:
+                # Matching Order and related refunds exists in odoo.
+                updates[related_order if related_order_id else dotykacka_order] = order
+            else:
+                # No matching DOrder or related refunds exists in odoo.
+                queued.append(order)
+            processed += 1
+        self._update_orders(updates)
+        if queued:
+            self.env['dotykacka.queue'].create(
+                [
+                    {
+                        'order_external_id': order.get('externalid', DEFAULT_ERROR_VALUE),
+                        'request_data': json_codec.dumps_str(order),
+                    }
+                    for order in queued
+                ]
+            )
+        return processed
+
+    def _update_orders(self, updates):
+        """
+        Write incoming data to dotykacka orders, orders with the same values in one write.
+
+        :param updates: Dictionary {dotykacka.order: dotykacka order data}
+        """
+        grouped = {}
+        for dotykacka_order, order in updates.items():
+            key = (self.get_state(order), order.get('note', False))
+            grouped.setdefault(key, self.env['dotykacka.order'])
+            grouped[key] |= dotykacka_order
+        now = fields.Datetime.now()
+        for (state, note), dotykacka_orders in grouped.items():
+            dotykacka_orders.write({'state': state, 'note': note, 'updated_at': now})
+
     def order_refund(self, order):
         """Create refund order or queue data."""
         rel_order_id = order.get('relatedorderid', DEFAULT_ERROR_VALUE)
@@ -171,56 +243,48 @@ class DotykackaParser(models.TransientModel):
         return self.env['dotykacka.queue'].create(
             {
                 related_field: field_value,
-                'request_data': json.dumps(order),
+                'request_data': json_codec.dumps_str(order),
             }
         )
 
-    def _check_queue(self, dotykacka_order, data):
-        """
-        Map matching data in queue to related dotykacka.order.
-
-        :param dotykacka_order: Record Dotykacka Order
-        :param data: Prepared data for dotykacka order
-        """
-        external_id = data.get('external-id', DEFAULT_ERROR_VALUE)
-        self._process_queue(dotykacka_order, 'order_external_id', external_id)
-        self._process_queue(dotykacka_order, 'order_related_id', dotykacka_order.dotykacka_id)
-
-    def _process_queue(self, dotykacka_order, field, value):
-        """
-        Process requests in queue based on searched values.
-
-        After successfully processing data in queue, delete the record.
-
-        :param dotykacka_order: Record Dotykacka Order
-        :param field: Searched key
-        :param value: searched value
-        """
-        queue_records = self.env['dotykacka.queue'].search([(field, '=', value)])
-        for queue_record in queue_records:
-            order_data = json.loads(queue_record.request_data)
-            if field == 'order_external_id':
-                self._update_order(dotykacka_order, order_data)
-            elif field == 'order_related_id':
-                self.order_create(order_data)
-            queue_record.unlink()
-
     def log_request(self, endpoint):
         """Log request to api logger."""
-        self.env['api_manager.logger'].create(
+        self.env['api_manager.logger'].log(
+            LOG_ORIGIN,
+            "incoming",
             {
-                'created_at': datetime.now(),
-                'origin': LOG_ORIGIN,
-                'direction': "incoming",
-                'data': {
-                    "endpoint": endpoint,
-                    "headers": self.request.httprequest.headers,
-                    "cookies": self.request.httprequest.cookies,
-                    "data": self.request.httprequest.data,
-                },
-            }
+                "endpoint": endpoint,
+                "headers": self.request.httprequest.headers,
+                "cookies": self.request.httprequest.cookies,
+                # Streamed body is read by the endpoint, it is never held in memory whole
+                "data": (
+                    None
+                    if getattr(self.request, 'body_streamed', False)
+                    else self.request.httprequest.data
+                ),
+            },
+            endpoint=f"/{endpoint.lstrip('/')}",
+            correlation_key=self._get_correlation_keys(),
         )
 
+    def _get_correlation_keys(self):
+        """
+        Return references of orders in incoming data, used to search logs.
+
+        :return: List of external ids (PoS order references) or dotykacka ids, one per order
+        """
+        data = self.data if isinstance(self.data, dict) else {}
+        orders = [data['order']] if isinstance(data.get('order'), dict) else []
+        items = data.get('items')
+        if isinstance(items, list):  # Streamed items are read by the endpoint only
+            orders += [item for item in items if isinstance(item, dict)]
+        keys = []
+        for order in orders:
+            key = order.get('external-id') or order.get('externalid') or order.get('orderid')
+            if key and str(key) not in keys:
+                keys.append(str(key))
+        return keys
+
     def clear(self):
         """Clear object and flush any temporary data."""
         self.data = False
@@ -2,13 +2,16 @@
 __version__ = "1.0"
 
 import logging
-import math
+from datetime import timezone
 
-from odoo import _, models
+from odoo import _, api, fields, models
+from odoo.addons.api_manager.utils import json_stream
 from odoo.exceptions import ValidationError
 
 _logger = logging.getLogger(__name__)
 
+DELTA_PAGE_SIZE = 100  # Maximum page size of Dotykacka API
+
 
 class DotykackaProductCatalog(models.TransientModel):
     """Product catalog synchronization manager."""
@@ -77,29 +80,41 @@ class DotykackaProductCatalog(models.TransientModel):
 
         :return: bool True if success, False otherwise
         """
+        return self._dotykacka_create_products_pages([product_ids_lst], company)
+
+    def _dotykacka_create_products_pages(self, pages: list, company) -> bool:
+        """
+        Create products in dotykacka, pages are sent concurrently.
+
+        :param pages: list of lists of product.product ids, one request per page
+        :param company: company object
+
+        :return: bool True if all pages succeeded, False otherwise
+        """
         self.env.company = company
         dotykacka_base = self.env['dotykacka.base']
         product_product = self.with_context(force_company=company.id).env['product.product']
         request_name = 'connector_dotykacka.api_request_dotykacka_create_product'
         request = self.env.ref(request_name)
-        product_ids = product_product.browse(product_ids_lst)
-        data_list = dotykacka_base.dotykacka_map_data(self._name, product_ids)
-        cloud_id = self.env['api_manager.request_parameter'].search(
-            [
-                ('provider', '=', request.provider.id),
-                ('key', '=', 'cloud_id'),
-                ('company_id', '=', self.env.company.id),
-            ]
-        )
-        response = request.send_request_dotykacka(
-            params={"{cloud_id}": cloud_id.value}, data=data_list, return_type='decoded'
-        )
-        for item in response:
-            dotykacka_base.write_metadata(product_product, item, company)
+        cloud_id = self.env['dotykacka.base'].get_cloud_id(request.provider)
+        calls = [
+            {
+                'params': {"{cloud_id}": cloud_id},
+                'data': dotykacka_base.dotykacka_map_data(self._name, product_product.browse(ids)),
+            }
+            for ids in pages
+        ]
+        results = request.send_requests_batch_dotykacka(calls)
+        for result in results:
+            if not result.success:
+                _logger.warning("Unable to create products in dotykacka: %s", result.error)
+                continue
+            for item in result.data:
+                dotykacka_base.write_metadata(product_product, item, company)
 
-        return bool(response)
+        return all(result.success for result in results)
 
-    def _dotykacka_write_products(self, product_ids: list, company) -> bool:  # pylint:disable=R0914
+    def _dotykacka_write_products(self, product_ids: list, company) -> bool:
         """
         Write products in dotykacka.
 
@@ -108,51 +123,70 @@ class DotykackaProductCatalog(models.TransientModel):
 
         :return: bool True if success, False otherwise
         """
+        return self._dotykacka_write_products_pages([product_ids], company)
+
+    # pylint:disable=R0914
+    def _dotykacka_write_products_pages(self, pages: list, company) -> bool:
+        """
+        Write products in dotykacka, pages are sent concurrently.
+
+        Each page needs ETag of its products, so all pages are fetched in one batch first
+        and written in second batch.
+
+        :param: pages: list of lists of product.product ids, one request per page
+        :param: company: company object
+
+        :return: bool True if all pages succeeded, False otherwise
+        """
         self.env.company = company
         dotykacka_base = self.env['dotykacka.base']
         product_product = self.with_context(force_company=company.id).env['product.product']
         request_put = self.env.ref('connector_dotykacka.api_request_dotykacka_write_products')
         request_get = self.env.ref('connector_dotykacka.api_request_dotykacka_get_products')
-        products = product_product.browse(product_ids)
-        product_dotykacka_ids = products.mapped('dotykacka_id')
         # Do not process on empty records.
-        if not product_dotykacka_ids:
+        pages = [
+            products
+            for products in (product_product.browse(ids) for ids in pages)
+            if products.mapped('dotykacka_id')
+        ]
+        if not pages:
             return False
-        ids_string = ','.join(str(a) for a in product_dotykacka_ids)
-        filter_request = f"?filter=id|in|{ids_string}&limit={self.per_page}"
-        cloud_id = self.env['api_manager.request_parameter'].search(
-            [
-                ('provider', '=', request_get.provider.id),
-                ('key', '=', 'cloud_id'),
-                ('company_id', '=', self.env.company.id),
-            ]
-        )
-        # Get ETag for product
-        dotykacka_response = request_get.send_request_dotykacka(
-            params={"{cloud_id}": cloud_id.value, "{filter}": filter_request}, return_type='decoded'
-        )
-        # Dotykacka returns items in different order as requested, here we are sorting our
-        # recordset to match returned order.
-        products_sorted = self.with_context(force_company=company.id).env['product.product']
-        # pylint:disable=W0640, W0631
-        for item in dotykacka_response['data']:
-            products_sorted += products.filtered(lambda r: r.dotykacka_id == item['id'])
-
-        dotykacka_etag = request_get.response.headers['ETag'].replace('"', '')
-        request_put._headers['If-Match'] = dotykacka_etag  # pylint:disable=W0212
-        data_list = dotykacka_base.dotykacka_map_data(self._name, products_sorted)
-        response = request_put.send_request_dotykacka(
-            params={
-                "{cloud_id}": cloud_id.value,
-            },
-            data=data_list,
-            return_type='decoded',
-        )
-        if not response:
-            return False
-        for item in response:
-            dotykacka_base.write_metadata(product_product, item, company)
-        return bool(response)
+        cloud_id = self.env['dotykacka.base'].get_cloud_id(request_get.provider)
+        # Get ETag for products
+        get_calls = []
+        for products in pages:
+            ids_string = ','.join(str(a) for a in products.mapped('dotykacka_id'))
+            filter_request = f"?filter=id|in|{ids_string}&limit={self.per_page}"
+            get_calls.append({'params': {"{cloud_id}": cloud_id, "{filter}": filter_request}})
+        get_results = request_get.send_requests_batch_dotykacka(get_calls)
+
+        put_calls = []
+        for products, result in zip(pages, get_results):
+            if not result.success:
+                _logger.warning("Unable to get products from dotykacka: %s", result.error)
+                continue
+            # Dotykacka returns items in different order as requested, here we are sorting our
+            # recordset to match returned order.
+            products_sorted = product_product
+            # pylint:disable=W0640, W0631
+            for item in result.data['data']:
+                products_sorted += products.filtered(lambda r: r.dotykacka_id == item['id'])
+            dotykacka_etag = result.response.headers['ETag'].replace('"', '')
+            put_calls.append(
+                {
+                    'params': {"{cloud_id}": cloud_id},
+                    'headers': {'If-Match': dotykacka_etag},
+                    'data': dotykacka_base.dotykacka_map_data(self._name, products_sorted),
+                }
+            )
+        put_results = request_put.send_requests_batch_dotykacka(put_calls)
+        for result in put_results:
+            if not result.success:
+                _logger.warning("Unable to write products in dotykacka: %s", result.error)
+                continue
+            for item in result.data:
+                dotykacka_base.write_metadata(product_product, item, company)
+        return len(put_results) == len(pages) and all(result.success for result in put_results)
 
     def create_products(self, products, company):
         """
@@ -160,11 +194,15 @@ class DotykackaProductCatalog(models.TransientModel):
 
         :param products: product.product recordset
         :param company: company object
+
+        :return: bool True if all pages succeeded, False otherwise
         """
-        existing_products = self._check_existing_products(products.mapped('id'), company)
-        products -= existing_products
+        existing_products, unchecked = self._check_existing_products(products.ids, company)
+        # Products of failed pages may exist in dotykacka, they are created by the next run
+        products -= existing_products | unchecked
         product_ids_create = products.mapped('id')
-        self._create_write_iter('create', product_ids_create, company)
+        created = self._create_write_iter('create', product_ids_create, company)
+        return created and not unchecked
 
     def update_products(self, products, company):
         """
@@ -172,48 +210,57 @@ class DotykackaProductCatalog(models.TransientModel):
 
         :param products: product.product recordset
         :param company: company object
+
+        :return: bool True if all pages succeeded, False otherwise
         """
         product_ids_update = products.mapped('id')
-        self._create_write_iter('write', product_ids_update, company)
+        return self._create_write_iter('write', product_ids_update, company)
 
-    def _check_existing_products(self, product_ids: list, company):
+    def _check_existing_products(self, product_ids: list, company, max_workers=None):
         """
         Sync existing product in dotykacka.
 
+        Pages are requested concurrently, at most max_workers at once.
+
         :param product_ids: list of product.product ids
         :param company: company object
+        :param max_workers: Maximum of requests in flight, provider limit is used when not set
 
-        :return: product.product recordset of existing products in dotykacka
+        :return: tuple(product.product recordset of existing products in dotykacka,
+            product.product recordset of products whose page failed)
         """
         self.env.company = company
         request = self.env.ref('connector_dotykacka.api_request_dotykacka_get_products')
-        cloud_id = self.env['api_manager.request_parameter'].search(
-            [
-                ('provider', '=', request.provider.id),
-                ('key', '=', 'cloud_id'),
-                ('company_id', '=', self.env.company.id),
-            ]
-        )
+        cloud_id = self.env['dotykacka.base'].get_cloud_id(request.provider)
+        product_product = self.with_context(force_company=company.id).env['product.product']
 
-        page = 0
-        per_page = 50
-        last_page = math.ceil(len(product_ids) / per_page)
-        result = self.with_context(force_company=company.id).env['product.product']
-
-        while page < last_page:
-            limit = page * per_page
-            ids = product_ids[limit : limit + per_page]
-            products = request.send_request_dotykacka(
-                params={
-                    "{cloud_id}": cloud_id.value,
+        pages = self._split_pages(product_ids)
+        calls = [
+            {
+                'params': {
+                    "{cloud_id}": cloud_id,
                     "{filter}": f"?filter%3DexternalId%7Cin%7C{(','.join(str(a) for a in ids))}",
                 },
-                return_type='decoded',
-            )
-            result += self._process_dotykacka_products_in_odoo(products, False, company)
-
-            page += 1
-        return result
+            }
+            for ids in pages
+        ]
+        results = request.send_requests_batch_dotykacka(calls, max_workers=max_workers)
+        existing_ids, failed_ids = set(), set()
+        for index, (ids, page) in enumerate(zip(pages, results), start=1):
+            if page.status_code == 404:
+                continue  # None of the products exists in dotykacka
+            if not page.success:
+                _logger.warning(
+                    "Unable to check page %s/%s of products in dotykacka: %s",
+                    index,
+                    len(pages),
+                    page.error,
+                )
+                failed_ids.update(ids)
+                continue
+            existing = self._process_dotykacka_products_in_odoo(page.data, False, company)
+            existing_ids.update(existing.ids)
+        return product_product.browse(list(existing_ids)), product_product.browse(list(failed_ids))
 
     # pylama:ignore=W0212
     def _create_write_iter(self, method_type, product_ids: list, company):
@@ -223,35 +270,18 @@ class DotykackaProductCatalog(models.TransientModel):
         :param method_type: str 'create'/'write' method to call
         :param product_ids: list of product.product ids
         :param company: company object
-        """
-        pages = self._compute_paging(len(product_ids))
-        iteration = 1
-        processed_products = 0
-        pages_overflow = pages[1] != 0
-        pages_total = pages[0] if not pages_overflow else pages[0] + 1
-        while iteration <= pages_total:
-            pages_end = (
-                processed_products + pages[1]
-                if pages_overflow and iteration == pages_total
-                else processed_products + self.per_page
-            )
-            products_slice = product_ids[processed_products:pages_end]
-            if not products_slice:
-                processed_products = iteration * self.per_page
-                iteration += 1
-                continue
 
-            if method_type == 'create':
-                self.with_context(dotykacka_noupdate=True)._dotykacka_create_products(
-                    products_slice, company
-                )
-            elif method_type == 'write':
-                self.with_context(dotykacka_noupdate=True)._dotykacka_write_products(
-                    products_slice, company
-                )
-
-            processed_products = iteration * self.per_page
-            iteration += 1
+        :return: bool True if all pages succeeded, False otherwise
+        """
+        if not product_ids:
+            return True
+        pages = self._split_pages(product_ids)
+        catalog = self.with_context(dotykacka_noupdate=True)
+        if method_type == 'create':
+            return catalog._dotykacka_create_products_pages(pages, company)
+        if method_type == 'write':
+            return catalog._dotykacka_write_products_pages(pages, company)
+        return False
 
     # pylama:ignore=C901
     def _process_dotykacka_products_in_odoo(self, products, update: bool, company):
@@ -267,7 +297,8 @@ class DotykackaProductCatalog(models.TransientModel):
         recordset = self.with_context(force_company=company.id).env['product.product']
         if not products:
             return recordset
-        for product in products['data']:
+        product_ids = []
+        for product in products.get('data', []):
             product_id = False
             # If data has an EAN, search for product
             if product['ean']:
@@ -293,24 +324,159 @@ class DotykackaProductCatalog(models.TransientModel):
                 if not product_id.dotykacka_id:
                     dotykacka_base.write_metadata(product_id, product, company)
                     if product['externalId'] != product_id.id:
-                        recordset += product_id
+                        product_ids += product_id.ids
                 else:
                     if product_id.dotykacka_id != product['id']:
                         dotykacka_base.write_metadata(product_id, product, company)
         if update:
-            self._dotykacka_write_products(recordset.ids, company)
-        return recordset
+            self._dotykacka_write_products(product_ids, company)
+        return recordset.browse(product_ids)
 
     @classmethod
-    def _compute_paging(cls, count: int) -> list:
+    def _split_pages(cls, items: list) -> list:
+        """
+        Split items into pages.
+
+        :param items: list of items to process
+
+        :return: list of pages, each containing at most per_page items
+        """
+        return [items[index : index + cls.per_page] for index in range(0, len(items), cls.per_page)]
+
+    @api.model
+    def _cron_sync_products_delta(self):
+        """Run delta synchronization for every company with configured dotykacka cloud."""
+        for company in self.env['res.company'].search([]):
+            try:
+                self.sync_products_delta(company)
+                self.env.cr.commit()  # pylint:disable=E8102
+            except Exception:  # pylint:disable=W0703
+                self.env.cr.rollback()
+                _logger.exception("Dotykacka delta sync of %s failed.", company.name)
+
+    def sync_products_delta(self, company) -> bool:
+        """
+        Synchronize only products changed since the last run.
+
+        Products with versionDate newer than the watermark are requested from Dotykacka
+        and mapped to odoo products, then odoo products changed since the last export
+        are created or written in Dotykacka. Each watermark is moved only when its part
+        succeeded, so failed items are synchronized again by the next run.
+
+        :param company: company object
+        :return: bool True if both directions succeeded
         """
-        Compute paging for recordset.
+        self.env.company = company
+        request = self.env.ref('connector_dotykacka.api_request_dotykacka_get_products')
+        cloud_id = self.env['dotykacka.base'].get_cloud_id(request.provider)
+        if not cloud_id:
+            return False
+        watermark = self.env['dotykacka.sync_watermark'].get_watermark(company, cloud_id, 'product')
+        started_at = fields.Datetime.now()
+        vals = {'last_run': started_at}
+        remote_version = self._pull_changed_products(
+            request, cloud_id, watermark.remote_version, company
+        )
+        if remote_version is not False:
+            vals['remote_version'] = remote_version
+        pushed = self._push_changed_products(watermark.local_version, company)
+        if pushed:
+            vals['local_version'] = started_at
+        watermark.write(vals)
+        return remote_version is not False and pushed
+
+    def _pull_changed_products(self, request, cloud_id, since, company):
+        """
+        Map products changed in Dotykacka after since to odoo products.
+
+        Pages are streamed sorted by versionDate and processed in chunks, so memory doesn't
+        depend on number of changed products. Pages are requested by keyset, each one from
+        the latest versionDate received so far, so products changed during the sync don't
+        shift unread products to already read offsets. Products with the same versionDate
+        may span pages, so boundary is requested inclusively and ids already received
+        with that versionDate are skipped.
+
+        :param request: api_manager.request Get Products
+        :param cloud_id: Dotykacka cloud ID
+        :param since: Naive UTC datetime, all products are requested if not set
+        :param company: company object
 
-        :param count: total number of items to process
+        :return: Latest received versionDate, since if nothing changed, False on failure
+        """
+        convert_timestamp = self.env['dotykacka.base'].convert_timestamp
+        latest = since
+        seen = set()  # Ids of received products with versionDate equal to latest
+        operator = 'gt'  # Products of since were received by the last run
+        while True:
+            query = f"?sort=versionDate&limit={DELTA_PAGE_SIZE}"
+            if latest:
+                millis = int(latest.replace(tzinfo=timezone.utc).timestamp() * 1000)
+                query += f"&filter=versionDate|{operator}|{millis}"
+            items = request.send_request_dotykacka(
+                params={"{cloud_id}": cloud_id, "{filter}": query},
+                return_type='stream',
+                stream_key='data',
+            )
+            if not items:
+                # Dotykacka answers 404 when no product matches the filter
+                return latest if request.status_code == 404 else False
+            received = 0
+            fresh = 0
+            for chunk in json_stream.chunked(items, self.per_page):
+                received += len(chunk)
+                products = []
+                for item in chunk:
+                    version = item.get('versionDate') and convert_timestamp(item['versionDate'])
+                    if version and latest and version <= latest:
+                        if item.get('id') in seen:
+                            continue
+                        seen.add(item.get('id'))
+                    elif version:
+                        latest, seen = version, {item.get('id')}
+                    products.append(item)
+                if products:
+                    self._process_dotykacka_products_in_odoo({'data': products}, False, company)
+                    fresh += len(products)
+            request.clear()
+            if received < DELTA_PAGE_SIZE:
+                return latest
+            if fresh:
+                operator = 'gteq'
+            else:
+                # Whole page has the same versionDate, move past it to avoid endless loop
+                _logger.warning("Dotykacka page of products with versionDate %s skipped.", latest)
+                operator = 'gt'
+
+    def _push_changed_products(self, since, company) -> bool:
+        """
+        Create or write odoo products changed since the last export in Dotykacka.
 
-        :return: list (pages, overflow)
+        :param since: Naive UTC datetime, all not exported products are considered if not set
+        :param company: company object
+
+        :return: bool True if all pages succeeded
         """
-        return (count // cls.per_page, count % cls.per_page)
+        domain = [
+            ('available_in_pos', '=', True),
+            ('dotykacka_sync_disabled', '=', False),
+            ('categ_id.dotykacka_category_id', '!=', False),
+        ]
+        if since:
+            # Variant write clears dotykacka_exported, template write doesn't touch variants
+            domain += [
+                '|',
+                ('dotykacka_exported', '=', False),
+                ('product_tmpl_id.write_date', '>', since),
+            ]
+        else:
+            domain += [('dotykacka_exported', '=', False)]
+        products = (
+            self.with_context(force_company=company.id).env['product.product'].search(domain)
+        )
+        to_write = products.filtered('dotykacka_id')
+        created = self.create_products(products - to_write, company)
+        written = self.update_products(to_write, company)
+        return created and written
 
     def sync_products_to_dotykacka(self, product_id):
         """
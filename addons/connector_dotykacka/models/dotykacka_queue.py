@@ -2,12 +2,24 @@
 __version__ = "1.0"
 
 import logging
+from datetime import timedelta
 
 from odoo import _, api, fields, models
+from odoo.addons.api_manager.utils import json_codec
 from odoo.exceptions import ValidationError
 
 _logger = logging.getLogger(__name__)
 
+# Queue field -> SQL condition matching dotykacka.order "o" to queue entry "q"
+RECONCILE_JOINS = {
+    'order_external_id': "o.reference = q.order_external_id AND o.dotykacka_id IS NOT NULL",
+    'order_related_id': "o.dotykacka_id = q.order_related_id",
+}
+
+
+class NotReconciled(Exception):
+    """Queued data couldn't be applied to matching dotykacka.order yet."""
+
 
 class DotykackaQueue(models.Model):
     """Queue processor for incoming dotykacka data."""
@@ -15,9 +27,17 @@ class DotykackaQueue(models.Model):
     _name = 'dotykacka.queue'
     _order = 'write_date desc'
 
-    order_external_id = fields.Char()
-    order_related_id = fields.Char()
+    order_external_id = fields.Char(index=True)
+    order_related_id = fields.Char(index=True)
     request_data = fields.Text(required=True)
+    attempts = fields.Integer(default=0, readonly=True)
+    next_attempt_at = fields.Datetime(
+        default=fields.Datetime.now,
+        index=True,
+        readonly=True,
+        help="Empty when entry ran out of attempts.",
+    )
+    error = fields.Text(readonly=True)
 
     @api.constrains('order_external_id', 'order_related_id')
     def _check_external_fields(self):
@@ -26,3 +46,91 @@ class DotykackaQueue(models.Model):
                 raise ValidationError(
                     _("Either Order External ID or Order Related ID must be provided.")
                 )
+
+    @api.model
+    def _reconcile(self, chunk_size=500, max_attempts=10):
+        """
+        Apply queued data to dotykacka orders which exist in odoo now.
+
+        Pending entries are joined to dotykacka.order in SQL and processed in chunks,
+        every chunk is committed. Applied entries are deleted, failed ones are rescheduled
+        with exponential delay until they run out of attempts.
+
+        :param chunk_size: Number of entries processed in one transaction
+        :param max_attempts: Attempts before entry is no longer reconciled
+        """
+        for field, condition in RECONCILE_JOINS.items():
+            while True:
+                matches = self._get_matches(field, condition, chunk_size)
+                if not matches:
+                    break
+                self._reconcile_matches(field, matches, max_attempts)
+                self.env.cr.commit()  # pylint:disable=E8102
+                if len(matches) < chunk_size:
+                    break
+
+    @api.model
+    def _get_matches(self, field, condition, limit):
+        """
+        Lock due queue entries which have matching dotykacka.order.
+
+        :return: List of tuples (dotykacka.queue id, dotykacka.order id)
+        """
+        self.env.cr.execute(
+            f"""
+            SELECT q.id, o.id FROM dotykacka_queue q
+            JOIN dotykacka_order o ON {condition}
+            WHERE q.{field} IS NOT NULL AND q.next_attempt_at <= %s
+            ORDER BY q.id
+            LIMIT %s
+            FOR UPDATE OF q SKIP LOCKED
+            """,
+            (fields.Datetime.now(), limit),
+        )
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _reconcile_matches(self, field, matches, max_attempts):
+        entries = self.browse([queue_id for queue_id, _order_id in matches])
+        orders = self.env['dotykacka.order'].browse([order_id for _queue_id, order_id in matches])
+        entries.mapped('request_data')  # Prefetch whole chunk
+        orders.mapped('dotykacka_id')
+        parser = self.env['dotykacka.parser'].sudo()
+        done = self.browse()
+        for entry, dotykacka_order in zip(entries, orders):
+            try:
+                with self.env.cr.savepoint():
+                    entry._apply(parser, field, dotykacka_order)  # pylint:disable=W0212
+            except Exception as error:  # pylint:disable=W0703
+                _logger.warning("Dotykacka queue entry %s wasn't reconciled: %s", entry.id, error)
+                entry._reschedule(str(error), max_attempts)  # pylint:disable=W0212
+            else:
+                done |= entry
+        done.unlink()
+
+    def _apply(self, parser, field, dotykacka_order):
+        """
+        Apply queued data to dotykacka order.
+
+        :raises NotReconciled: If refund wasn't created, rolls back queue entry created by parser
+        """
+        self.ensure_one()
+        order_data = json_codec.loads(self.request_data)
+        if field == 'order_external_id':
+            parser._update_order(dotykacka_order, order_data)  # pylint:disable=W0212
+        elif not parser.order_create(order_data):
+            raise NotReconciled(_("Refund of %s wasn't created.") % dotykacka_order.display_name)
+
+    def _reschedule(self, error, max_attempts):
+        for entry in self:
+            attempts = entry.attempts + 1
+            delay = timedelta(minutes=min(2 ** attempts, 24 * 60))
+            entry.write(
+                {
+                    'attempts': attempts,
+                    'error': error,
+                    'next_attempt_at': (
+                        fields.Datetime.now() + delay if attempts < max_attempts else False
+                    ),
+                }
+            )
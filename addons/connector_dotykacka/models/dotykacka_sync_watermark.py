@@ -0,0 +1,50 @@
+"""Module for Dotykacka synchronization watermarks."""
+__version__ = "1.0"
+
+from odoo import api, fields, models
+
+
+class DotykackaSyncWatermark(models.Model):
+    """
+    Progress of incremental synchronization of one company and cloud.
+
+    Delete the record to force full synchronization on the next run.
+    """
+
+    _name = 'dotykacka.sync_watermark'
+    _description = "Dotykacka Sync Watermark"
+    _order = 'company_id, scope'
+    _rec_name = 'scope'
+
+    company_id = fields.Many2one('res.company', required=True, readonly=True, ondelete='cascade')
+    cloud_id = fields.Char("Cloud ID", required=True, readonly=True)
+    scope = fields.Selection([('product', 'Products')], required=True, readonly=True)
+    remote_version = fields.Datetime(
+        help="Latest versionDate received from Dotykacka, only newer items are requested."
+    )
+    local_version = fields.Datetime(
+        help="Start of the last successful export, only records changed since are exported."
+    )
+    last_run = fields.Datetime(readonly=True)
+
+    _sql_constraints = [
+        (
+            'watermark_uniq',
+            'unique (company_id, cloud_id, scope)',
+            "Scope can have only one watermark per company and cloud!",
+        ),
+    ]
+
+    @api.model
+    def get_watermark(self, company, cloud_id: str, scope: str):
+        """
+        Return watermark, create empty one on the first run.
+
+        :param company: res.company record
+        :param cloud_id: Dotykacka cloud ID
+        :param scope: Synchronized data, e.g. 'product'
+        :return: dotykacka.sync_watermark record
+        """
+        vals = {'company_id': company.id, 'cloud_id': cloud_id, 'scope': scope}
+        domain = [(key, '=', value) for key, value in vals.items()]
+        return self.search(domain, limit=1) or self.create(vals)
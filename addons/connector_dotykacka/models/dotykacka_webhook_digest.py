@@ -0,0 +1,95 @@
+"""Module for deduplication of Dotykacka webhooks."""
+__version__ = "1.0"
+
+import hashlib
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.addons.api_manager.utils.lru_cache import ExpiringLRU
+
+_logger = logging.getLogger(__name__)
+
+DEDUP_TTL_HOURS = 24
+# Digests of webhooks recognized as duplicates by the database in this process
+SEEN = ExpiringLRU(max_size=10000, ttl=DEDUP_TTL_HOURS * 3600)
+
+
+class DotykackaWebhookDigest(models.Model):
+    """
+    Digest of received webhook body.
+
+    Dotykacka redelivers webhooks, digests of recent ones are kept to acknowledge
+    redelivered duplicates without processing them again.
+    """
+
+    _name = 'dotykacka.webhook_digest'
+    _description = "Dotykacka Webhook Digest"
+    _order = 'received_at desc'
+    _rec_name = 'digest'
+    _log_access = False
+
+    digest = fields.Char(required=True, readonly=True)
+    endpoint = fields.Char(readonly=True)
+    received_at = fields.Datetime(required=True, readonly=True, index=True)
+
+    _sql_constraints = [
+        ('digest_uniq', 'unique (digest)', "Webhook digest must be unique!"),
+    ]
+
+    @staticmethod
+    def hash_body(body: bytes) -> str:
+        """Return hex SHA-256 of raw request body."""
+        return hashlib.sha256(body or b'').hexdigest()
+
+    @staticmethod
+    def get_digest(endpoint: str, body_hash: str) -> str:
+        """
+        Return digest of webhook.
+
+        Body is hashed separately, so streamed bodies can be hashed while they are read.
+
+        :param endpoint: Path of the endpoint
+        :param body_hash: Hex SHA-256 of raw request body, see :func:`hash_body`
+        :return: Hex SHA-256 of endpoint and body hash
+        """
+        return hashlib.sha256(f"{endpoint}\0{body_hash}".encode()).hexdigest()
+
+    @api.model
+    def register(self, endpoint: str, body_hash: str):
+        """
+        Record webhook as received.
+
+        Checks in-process cache first, then inserts digest without ORM, so duplicates
+        cost at most one statement. Digest is removed with rollback of the request, so
+        webhooks which failed are processed again when redelivered. Only digests found
+        in the database are cached, those are committed already.
+
+        :param endpoint: Path of the endpoint
+        :param body_hash: Hex SHA-256 of raw request body, see :func:`hash_body`
+        :return: Digest if webhook is new, False if it is duplicate
+        """
+        digest = self.get_digest(endpoint, body_hash)
+        if digest in SEEN:
+            return False
+        self.env.cr.execute(
+            """
+            INSERT INTO dotykacka_webhook_digest (digest, endpoint, received_at)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (digest) DO NOTHING
+            RETURNING id
+            """,
+            (digest, endpoint, fields.Datetime.now()),
+        )
+        if not self.env.cr.fetchone():
+            SEEN.add(digest)
+            return False
+        return digest
+
+    @api.model
+    def _clear_expired(self, hours=DEDUP_TTL_HOURS):
+        """Delete digests older than given number of hours."""
+        self.env.cr.execute(
+            "DELETE FROM dotykacka_webhook_digest WHERE received_at < %s",
+            (fields.Datetime.now() - timedelta(hours=hours),),
+        )
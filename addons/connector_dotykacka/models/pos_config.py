@@ -13,6 +13,11 @@ class PosConfig(models.Model):
     use_dotykacka = fields.Boolean("Process Orders in Dotykacka?", default=False)
 
     dotykacka_branch_id = fields.Char(string='Dotykacka Branch ID')
+    dotykacka_timeout = fields.Float(
+        string='Dotykacka Timeout (s)',
+        default=30,
+        help="Maximum time spent by sending single order to dotykacka, including HW ping.",
+    )
 
     @api.constrains('dotykacka_branch_id')
     def _check_dotykacka_branch_id(self):
@@ -31,3 +36,8 @@ class PosConfig(models.Model):
                     _('Branch %(branch_id)s is already used on register %(pos_name)s.')
                     % {'branch_id': pos_config.dotykacka_branch_id, 'post_name': pos_config.name}
                 )
+
+    @api.constrains('dotykacka_timeout')
+    def _check_dotykacka_timeout(self):
+        if any(pos_config.dotykacka_timeout <= 0 for pos_config in self):
+            raise ValidationError(_('Dotykacka timeout must be positive.'))
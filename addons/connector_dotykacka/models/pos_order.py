@@ -166,17 +166,7 @@ class PosOrder(models.Model):
 
         """
         request = self.env.ref('connector_dotykacka.api_request_dotykacka_pos_actions')
-        cloud_id = (
-            self.env['api_manager.request_parameter']
-            .search(
-                [
-                    ('provider', '=', request.provider.id),
-                    ('key', '=', 'cloud_id'),
-                    ('company_id', '=', self.env.company.id),
-                ]
-            )
-            .value
-        )
+        cloud_id = self.env['dotykacka.base'].get_cloud_id(request.provider)
         branch_id = self.session_id.config_id.dotykacka_branch_id
         return request, branch_id, cloud_id
 
@@ -224,16 +214,20 @@ class PosOrder(models.Model):
 
         :return: bool True if request was successful, False otherwise
         """
-        if not self.env['dotykacka.base'].ping_pos_hw(cloud_id, branch_id):
+        deadline = request.deadline_after(self.session_id.config_id.dotykacka_timeout)
+        if not self.env['dotykacka.base'].ping_pos_hw(cloud_id, branch_id, deadline):
             return False
         request.send_request_dotykacka(
             params={"{cloud_id}": cloud_id, "{branch_id}": branch_id},
             data=processed_data,
             return_type='status_code',
+            deadline=deadline,
+            correlation_key=self.pos_reference,
         )
-        if not request.response.status_code != 200:
+        if request.timed_out:
+            _logger.warning("Order %s wasn't sent to dotykacka in time.", self.pos_reference)
             return False
-        return True
+        return request.status_code == 200
 
     def _ui_send_to_dotykacka(self) -> bool:
         """Send already processed order to dotykacka."""
@@ -1,33 +1,183 @@
 """Monkeypatch of HTTP module."""
 # pylint:disable=all
-import json
+import hashlib
+import itertools
 import logging
 
-from odoo.http import JsonRequest
+from odoo import tools
+from odoo.addons.api_manager.utils import json_codec, json_stream
+from odoo.http import db_monodb, JsonRequest
 from werkzeug import exceptions
 
+from ..utils.admission import Admission
+
 _logger = logging.getLogger(__name__)
 
+# Size limit applies to Dotykacka endpoints only, other JSON requests are left untouched.
+# Configured in server configuration file, e.g. 'dotykacka_max_body_size = 104857600'
+LIMITED_PREFIX = '/rest/v1/dotykacka/'
+MAX_BODY_SIZE = int(tools.config.get('dotykacka_max_body_size', 64 * 1024 * 1024))
+# Routes whose array body is decoded item by item while the controller iterates it
+STREAMED_PATHS = {'/rest/v1/dotykacka/order/update'}
+WHITESPACE = b' \t\n\r'
+# Keys of cloud ID in webhook data, query argument 'cloud_id' of webhook URL takes precedence
+CLOUD_KEYS = ('cloudid', 'cloud-id', '_cloudId')
+
+
+class StreamedArray:
+    """
+    Items of JSON array body decoded lazily from WSGI input.
+
+    Can be iterated only once. Body is hashed while it is read, see :func:`hexdigest`.
+    First item may be decoded in advance by :func:`first`, it is yielded by iteration too.
+    """
+
+    def __init__(self, head: bytes, stream, max_size: int):
+        self._head = head
+        self._stream = stream
+        self._max_size = max_size
+        self._hash = hashlib.sha256()
+        self._consumed = False
+        self._items = None
+        self._peeked = []
+        self.size = 0
+
+    def __iter__(self):
+        if self._consumed:
+            raise RuntimeError("Streamed request body can be iterated only once.")
+        self._consumed = True
+        if self._items is None:
+            return json_stream.iter_array(self._chunks())
+        return itertools.chain(self._peeked, self._items)
+
+    def first(self):
+        """
+        Return first item without consuming it, None if array is empty.
+
+        Body is read only until the end of the first item.
+
+        :raises json.JSONDecodeError: If beginning of body isn't valid JSON array
+        """
+        if self._consumed:
+            raise RuntimeError("Streamed request body was already iterated.")
+        if self._items is None:
+            self._items = json_stream.iter_array(self._chunks())
+            self._peeked = list(itertools.islice(self._items, 1))
+        return self._peeked[0] if self._peeked else None
+
+    def _chunks(self):
+        reads = iter(lambda: self._stream.read(json_stream.CHUNK_SIZE), b'')
+        for chunk in itertools.chain([self._head], reads):
+            self.size += len(chunk)
+            if self.size > self._max_size:
+                raise exceptions.RequestEntityTooLarge()
+            self._hash.update(chunk)
+            yield chunk
+
+    def hexdigest(self) -> str:
+        """Return SHA-256 of the body, valid once items were iterated."""
+        return self._hash.hexdigest()
+
+
+def _read_head(stream) -> bytes:
+    """Read body until first non-whitespace byte."""
+    head = b''
+    while not head.strip(WHITESPACE):
+        chunk = stream.read(json_stream.CHUNK_SIZE)
+        if not chunk:
+            break
+        head += chunk
+    return head
+
+
+def _get_cloud(data) -> str:
+    """Return cloud ID of first order in body, streamed body is read only up to first item."""
+    if not isinstance(data, dict):
+        return None
+    orders = data.get('items')
+    if isinstance(orders, StreamedArray):
+        order = orders.first()
+    else:
+        order = orders[0] if isinstance(orders, list) and orders else data.get('order')
+    if not isinstance(order, dict):
+        return None
+    return next((str(order[key]) for key in CLOUD_KEYS if order.get(key)), None)
+
 
 def patch_json_request():
-    """Patch JsonRequest init method to handle array body."""
+    """Patch JsonRequest init method to handle array body and admission of webhooks."""
 
     def new_init(self, *args):  # pylint:disable=W0612
         super(JsonRequest, self).__init__(*args)
+        self.admission = None
+        httprequest = self.httprequest
+        if httprequest.path.startswith(LIMITED_PREFIX):
+            dbname = self.session.db or db_monodb(httprequest)
+            if dbname:
+                # Rejected before body is read and before any environment exists
+                self.admission = Admission(dbname)
+        try:
+            init_json(self)
+        except Exception:
+            if self.admission:
+                self.admission.release()
+            raise
+
+    def init_json(self):
         self.params = {}
-        request = self.httprequest.get_data().decode(self.httprequest.charset)
+        self.body_streamed = False
+        httprequest = self.httprequest
+        limited = httprequest.path.startswith(LIMITED_PREFIX)
+        if limited and (httprequest.content_length or 0) > MAX_BODY_SIZE:
+            raise exceptions.RequestEntityTooLarge()
+        if self.admission:
+            self.admission.admit(httprequest.args.get('cloud_id'))
 
-        # Read POST content or POST Form Data named "request"
-        try:
-            self.jsonrequest = json.loads(request)
-        except ValueError:
-            msg = 'Invalid JSON data: %r' % (request,)
-            _logger.info('%s: %s', self.httprequest.path, msg)
-            raise exceptions.BadRequest(msg)
+        request = None
+        if httprequest.path in STREAMED_PATHS:
+            head = _read_head(httprequest.stream)
+            if head.lstrip(WHITESPACE).startswith(b'['):
+                self.body_streamed = True
+                self.jsonrequest = {
+                    'items': StreamedArray(head, httprequest.stream, MAX_BODY_SIZE)
+                }
+            else:
+                # Body was read from the stream, keep it available through get_data()
+                request = httprequest._cached_data = head + httprequest.stream.read()
+        if not self.body_streamed:
+            request = httprequest.get_data() if request is None else request
+            if limited and len(request) > MAX_BODY_SIZE:
+                raise exceptions.RequestEntityTooLarge()
+
+            # Read POST content or POST Form Data named "request", bytes are parsed directly
+            try:
+                self.jsonrequest = json_codec.loads(request)
+            except json_codec.DecodeError:
+                msg = 'Invalid JSON data: %r' % (request,)
+                _logger.info('%s: %s', httprequest.path, msg)
+                raise exceptions.BadRequest(msg)
 
         if isinstance(self.jsonrequest, list):  # Process array json
             self.jsonrequest = {'items': self.jsonrequest}
+        if self.admission and not httprequest.args.get('cloud_id'):
+            try:
+                cloud = _get_cloud(self.jsonrequest)
+            except ValueError as error:  # Streamed body doesn't start with valid item
+                _logger.info('%s: Invalid JSON data: %s', httprequest.path, error)
+                raise exceptions.BadRequest('Invalid JSON data: %s' % error)
+            self.admission.admit_cloud(cloud)
         self.params = dict(self.jsonrequest.get("params", {}))
         self.context = self.params.pop('context', dict(self.session.context))
 
+    original_exit = JsonRequest.__exit__
+
+    def new_exit(self, *args):  # pylint:disable=W0612
+        try:
+            return original_exit(self, *args)
+        finally:
+            # Slots are freed only after the request transaction was committed
+            if getattr(self, 'admission', None):
+                self.admission.release()
+
     JsonRequest.__init__ = new_init
+    JsonRequest.__exit__ = new_exit
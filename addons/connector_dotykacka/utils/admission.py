@@ -0,0 +1,98 @@
+"""Admission control of Dotykacka webhooks shared by all workers through database."""
+
+import hashlib
+import logging
+from typing import Optional
+
+from odoo import sql_db, tools
+from werkzeug import exceptions
+
+_logger = logging.getLogger(__name__)
+
+# Configured in server configuration file, e.g. 'dotykacka_webhook_max_concurrency = 4'.
+# Limits should stay below number of HTTP workers, so POS users always find a free one.
+# 0 disables the limit.
+MAX_CONCURRENCY = int(tools.config.get('dotykacka_webhook_max_concurrency', 4))
+MAX_PER_CLOUD = int(tools.config.get('dotykacka_webhook_max_per_cloud', 2))
+RETRY_AFTER = int(tools.config.get('dotykacka_webhook_retry_after', 5))
+
+# Slots are transaction level advisory locks, released by rollback even if request crashes
+_ACQUIRE_QUERY = """
+    SELECT key FROM unnest(%s::bigint[]) AS key
+    WHERE pg_try_advisory_xact_lock(key)
+    LIMIT 1
+"""
+
+
+class Throttled(exceptions.HTTPException):
+    """Webhook rejected by admission control, response carries Retry-After header."""
+
+    def __init__(self, code: int, retry_after: int):
+        self.code = code
+        self.retry_after = retry_after
+        super(Throttled, self).__init__("Too many webhooks are processed, try again later.")
+
+    def get_headers(self, *args, **kwargs):
+        """Add Retry-After to default headers."""
+        headers = super(Throttled, self).get_headers(*args, **kwargs)
+        return headers + [('Retry-After', str(self.retry_after))]
+
+
+def _slot_key(scope: str, slot: int) -> int:
+    """Return signed 64 bit advisory lock key of slot."""
+    digest = hashlib.blake2b(f"dotykacka.webhook:{scope}:{slot}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), 'big', signed=True)
+
+
+class Admission:
+    """
+    Concurrency slots held by one webhook request.
+
+    Slots are taken in a separate database connection without ORM, so rejected webhook
+    costs one short query and never waits. Connection is held until :func:`release`.
+    """
+
+    def __init__(self, dbname: str):
+        self._dbname = dbname
+        self._cr = None
+
+    def admit(self, cloud: Optional[str] = None) -> None:
+        """
+        Take global slot and slot of cloud if cloud is known.
+
+        :param cloud: Dotykacka cloud ID
+        :raises Throttled: 503 if all global slots are taken, 429 if all slots of cloud are
+        """
+        if not self._acquire('global', MAX_CONCURRENCY):
+            raise Throttled(503, RETRY_AFTER)
+        self.admit_cloud(cloud)
+
+    def admit_cloud(self, cloud: Optional[str]) -> None:
+        """
+        Take slot of cloud.
+
+        :param cloud: Dotykacka cloud ID, nothing is taken when not known
+        :raises Throttled: 429 if all slots of cloud are taken
+        """
+        if cloud and not self._acquire(f"cloud:{cloud}", MAX_PER_CLOUD):
+            raise Throttled(429, RETRY_AFTER)
+
+    def _acquire(self, scope: str, limit: int) -> bool:
+        if limit <= 0:
+            return True
+        if self._cr is None:
+            self._cr = sql_db.db_connect(self._dbname).cursor()
+        self._cr.execute(_ACQUIRE_QUERY, ([_slot_key(scope, slot) for slot in range(limit)],))
+        if self._cr.fetchone():
+            return True
+        _logger.info("Dotykacka webhook rejected, all %s slots of %s are taken.", limit, scope)
+        return False
+
+    def release(self) -> None:
+        """Free all slots, connection is rolled back and returned to pool."""
+        if self._cr is not None:
+            try:
+                self._cr.close()
+            except Exception:  # pylint:disable=W0703
+                _logger.exception("Release of dotykacka webhook slots failed.")
+            self._cr = None